@@ -0,0 +1,120 @@
+"""
+Benchmark: one hot SKU under concurrent decrements, plain path vs flash-sale
+mode (PUT /api/inventory/flash-sale/<id>).
+
+Both runs use a fresh WAL-file stand-in database with a per-statement delay
+modelling the MySQL round trip. Each thread sends single-unit decrements to
+PUT /api/inventory/update until the attempts are used up; stock runs out
+partway through so rejections are exercised too. A run fails if the final
+stock does not equal the starting stock minus the successful decrements.
+
+Usage:
+    python bench_flash_sale.py --threads 32 --stock 2000 --rtt-ms 0.5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from harness import emit, load_service, summarize
+from standin_db import StandInDatabase
+
+PRODUCT_ID = 1
+
+
+def run(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        database = StandInDatabase(rtt_ms=args.rtt_ms, path=os.path.join(tmp, f"{mode}.db"))
+        database.executemany(
+            "INSERT INTO inventory (product_id, product_name, quantity_available, unit_price) VALUES (%s, %s, %s, %s)",
+            [(PRODUCT_ID, "Hot SKU", args.stock, 9.99)]
+        )
+        service = load_service("inventory_service", database)
+        app = service.app
+
+        if mode == "flash_sale":
+            with app.test_client() as client:
+                client.put(f"/api/inventory/flash-sale/{PRODUCT_ID}",
+                           json={"enabled": True, "chunk_size": args.chunk_size})
+        database.reset_counters()
+
+        attempts = int(args.stock * args.attempts_factor)
+        remaining = [attempts]
+        outcomes = {"ok": 0, "insufficient": 0, "errors": 0}
+        samples = []
+        lock = threading.Lock()
+
+        def worker():
+            with app.test_client() as client:
+                while True:
+                    with lock:
+                        if remaining[0] == 0:
+                            return
+                        remaining[0] -= 1
+                    start = time.perf_counter()
+                    status = client.put("/api/inventory/update",
+                                        json={"product_id": PRODUCT_ID, "quantity_change": -1}).status_code
+                    elapsed = time.perf_counter() - start
+                    key = "ok" if status == 200 else "insufficient" if status == 400 else "errors"
+                    with lock:
+                        outcomes[key] += 1
+                        samples.append(elapsed)
+
+        threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        queries = database.queries
+
+        if mode == "flash_sale":
+            with app.test_client() as client:
+                client.put(f"/api/inventory/flash-sale/{PRODUCT_ID}", json={"enabled": False})
+
+        service.product_cache.clear()
+        with app.test_client() as client:
+            product = client.get(f"/api/inventory/check/{PRODUCT_ID}").get_json()
+
+    return {
+        "mode": mode,
+        "attempts": attempts,
+        "outcomes": outcomes,
+        "ops_per_second": round(attempts / wall, 1),
+        "db_queries": queries,
+        "latency": summarize(samples),
+        "final_stock": product["quantity_available"],
+        "final_reserved": product["quantity_reserved"],
+        "passed": product["quantity_available"] == args.stock - outcomes["ok"]
+        and product["quantity_reserved"] == 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--stock", type=int, default=2000)
+    parser.add_argument("--attempts-factor", type=float, default=1.25)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=0.5)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = {mode: run(mode, args) for mode in ("plain", "flash_sale")}
+    plain, flash = results["plain"], results["flash_sale"]
+    emit({
+        "threads": args.threads,
+        "stock": args.stock,
+        "rtt_ms": args.rtt_ms,
+        "chunk_size": args.chunk_size,
+        "results": results,
+        "speedup": round(flash["ops_per_second"] / plain["ops_per_second"], 2) if plain["ops_per_second"] else None,
+    }, args.output)
+    sys.exit(0 if all(r["passed"] for r in results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Hot-path benchmark suite for inventory_service.
+
+Seeds N products, then drives the real Flask app at fixed concurrency levels
+through two transports:
+    inprocess  Flask test client, no sockets; isolates handler + DB cost
+    http       the app served by a local threaded werkzeug server, called
+               over keep-alive HTTP sessions
+
+and reports throughput, p50/p95/p99 latency and DB statements per request
+for each endpoint. Runs are reproducible (fixed seed) and the JSON report
+carries the git commit, so reports from two commits can be compared with
+--baseline.
+
+By default the app runs against a WAL-file stand-in database with a
+simulated round trip per statement. --database mysql uses the service's own
+MySQL config instead: it inserts N "bench-" products, removes them again at
+the end, and counts statements from the server's Questions status counter.
+
+Usage:
+    python bench_inventory.py --products 5000 --concurrency 1,8,32
+    python bench_inventory.py --transports http --endpoints update --output after.json --baseline before.json
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from harness import emit, load_service, summarize
+from standin_db import StandInDatabase
+
+ENDPOINTS = ("check", "check_many", "update", "products")
+
+
+class StandInBackend:
+    def __init__(self, args):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.database = StandInDatabase(rtt_ms=args.rtt_ms, path=os.path.join(self._tmp.name, "bench.db"))
+        rng = random.Random(args.seed)
+        self.database.executemany(
+            "INSERT INTO inventory (product_id, product_name, quantity_available, unit_price) VALUES (%s, %s, %s, %s)",
+            [(i, f"bench-{i:07d}", rng.randint(50, 500), round(rng.uniform(1, 500), 2))
+             for i in range(1, args.products + 1)]
+        )
+        self.product_ids = list(range(1, args.products + 1))
+        self.service = load_service("inventory_service", self.database)
+
+    def queries(self):
+        return self.database.queries
+
+    def close(self):
+        self._tmp.cleanup()
+
+
+class MySqlBackend:
+    """The service's configured MySQL database; bench rows are removed on close."""
+
+    def __init__(self, args):
+        self.service = load_service("inventory_service")
+        connection = self.service.get_db_connection()
+        if connection is None:
+            sys.exit("Cannot connect to MySQL with inventory_service's DB_CONFIG")
+        rng = random.Random(args.seed)
+        cursor = connection.cursor()
+        cursor.executemany(
+            "INSERT INTO inventory (product_name, quantity_available, unit_price) VALUES (%s, %s, %s)",
+            [(f"bench-{i:07d}", rng.randint(50, 500), round(rng.uniform(1, 500), 2))
+             for i in range(1, args.products + 1)]
+        )
+        connection.commit()
+        cursor.execute("SELECT product_id FROM inventory WHERE product_name LIKE 'bench-%' ORDER BY product_id")
+        self.product_ids = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+        connection.close()
+
+    def queries(self):
+        connection = self.service.get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        value = int(cursor.fetchone()[1])
+        cursor.close()
+        connection.close()
+        return value
+
+    def close(self):
+        connection = self.service.get_db_connection()
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM inventory_changes WHERE product_name LIKE 'bench-%'")
+        cursor.execute("DELETE FROM inventory WHERE product_name LIKE 'bench-%'")
+        connection.commit()
+        cursor.close()
+        connection.close()
+
+
+class InProcessTransport:
+    name = "inprocess"
+
+    def __init__(self, app):
+        self.app = app
+
+    def session(self):
+        client = self.app.test_client()
+
+        def call(method, path, body=None):
+            return getattr(client, method)(path, json=body).status_code
+        return call
+
+    def close(self):
+        pass
+
+
+class HttpTransport:
+    name = "http"
+
+    def __init__(self, app):
+        import requests
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        self._requests = requests
+        self.server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def session(self):
+        http = self._requests.Session()
+
+        def call(method, path, body=None):
+            return http.request(method.upper(), self.base_url + path, json=body, timeout=60).status_code
+        return call
+
+    def close(self):
+        self.server.shutdown()
+
+
+def make_request(endpoint, rng, product_ids, step, batch):
+    """(method, path, body) for the step-th request of one worker."""
+    if endpoint == "check":
+        return "get", f"/api/inventory/check/{rng.choice(product_ids)}", None
+    if endpoint == "check_many":
+        ids = ",".join(str(product_id) for product_id in rng.sample(product_ids, batch))
+        return "get", f"/api/inventory/check?ids={ids}", None
+    if endpoint == "update":
+        # Alternate -1 / +1 so stock levels stay where they were seeded
+        return "put", "/api/inventory/update", {
+            "product_id": rng.choice(product_ids),
+            "quantity_change": -1 if step % 2 == 0 else 1,
+        }
+    # Name-prefix search matching up to 100 products, first page
+    prefix = f"bench-{rng.choice(product_ids):07d}"[:-2]
+    return "get", f"/api/inventory/products?q={prefix}&in_stock=true&limit=50", None
+
+
+def run_level(backend, transport, endpoint, concurrency, args):
+    per_worker = max(1, args.requests // concurrency)
+    samples = []
+    statuses = {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(index):
+        rng = random.Random(f"{args.seed}-{endpoint}-{concurrency}-{index}")
+        call = transport.session()
+        for step in range(args.warmup):
+            call(*make_request(endpoint, rng, backend.product_ids, step, args.batch))
+        barrier.wait()
+        local = []
+        local_statuses = {}
+        for step in range(per_worker):
+            method, path, body = make_request(endpoint, rng, backend.product_ids, step, args.batch)
+            start = time.perf_counter()
+            status = call(method, path, body)
+            local.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            samples.extend(local)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    queries_before = backend.queries()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    queries = backend.queries() - queries_before
+
+    total = len(samples)
+    return {
+        "transport": transport.name,
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": sum(count for status, count in statuses.items() if status >= 500),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(total / wall, 1) if wall else 0.0,
+        "latency": summarize(samples),
+        "db_queries_per_request": round(queries / total, 3) if total else 0.0,
+    }
+
+
+def compare(results, baseline_path):
+    import json
+    with open(baseline_path) as fh:
+        baseline = {
+            (r["transport"], r["endpoint"], r["concurrency"]): r
+            for r in json.load(fh)["results"]
+        }
+
+    def change(new, old):
+        return round((new - old) / old * 100.0, 1) if old else None
+
+    for result in results:
+        old = baseline.get((result["transport"], result["endpoint"], result["concurrency"]))
+        if old:
+            result["vs_baseline"] = {
+                "throughput_change_pct": change(result["throughput_rps"], old["throughput_rps"]),
+                "p95_change_pct": change(result["latency"]["p95_ms"], old["latency"]["p95_ms"]),
+                "db_queries_per_request_change": round(
+                    result["db_queries_per_request"] - old["db_queries_per_request"], 3),
+            }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def csv_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", choices=("standin", "mysql"), default="standin")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--rtt-ms", type=float, default=0.2,
+                        help="simulated DB round trip added to every statement (stand-in only)")
+    parser.add_argument("--concurrency", type=csv_list, default=["1", "8", "32"])
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per level")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per worker")
+    parser.add_argument("--endpoints", type=csv_list, default=list(ENDPOINTS))
+    parser.add_argument("--transports", type=csv_list, default=["inprocess", "http"])
+    parser.add_argument("--batch", type=int, default=20, help="ids per check_many request")
+    parser.add_argument("--no-cache", action="store_true", help="disable the service's product cache")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    backend = StandInBackend(args) if args.database == "standin" else MySqlBackend(args)
+    if args.no_cache:
+        backend.service.product_cache = backend.service.LRUCache(0)
+
+    results = []
+    try:
+        for transport_name in args.transports:
+            transport = (HttpTransport if transport_name == "http" else InProcessTransport)(backend.service.app)
+            try:
+                for endpoint in args.endpoints:
+                    for concurrency in args.concurrency:
+                        results.append(run_level(backend, transport, endpoint, int(concurrency), args))
+            finally:
+                transport.close()
+    finally:
+        backend.close()
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+    emit({
+        "git_commit": git_commit(),
+        "config": {
+            "database": args.database,
+            "products": args.products,
+            "rtt_ms": args.rtt_ms if args.database == "standin" else None,
+            "requests_per_level": args.requests,
+            "product_cache": not args.no_cache,
+            "seed": args.seed,
+        },
+        "results": results,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+GET /api/orders: per-order item queries (N+1) vs. batched IN (...) lookup.
+
+Usage:
+    python bench_order_listing.py --orders 10000 --rtt-ms 0.2
+"""
+import argparse
+import random
+
+from harness import emit, load_service, summarize, timed
+from standin_db import StandInDatabase
+
+
+def seed(database, orders, items_per_order, customers=200, products=500):
+    rng = random.Random(42)
+    database.executemany(
+        "INSERT INTO orders (order_id, customer_id, total_amount, status, created_at) "
+        "VALUES (%s, %s, %s, 'CONFIRMED', datetime('2025-01-01', '+' || %s || ' minutes'))",
+        [(i, rng.randint(1, customers), round(rng.uniform(5, 500), 2), i) for i in range(1, orders + 1)]
+    )
+    database.executemany(
+        "INSERT INTO order_items (order_id, product_id, quantity, unit_price_at_purchase) "
+        "VALUES (%s, %s, %s, %s)",
+        [
+            (i, rng.randint(1, products), rng.randint(1, 5), round(rng.uniform(1, 100), 2))
+            for i in range(1, orders + 1)
+            for _ in range(items_per_order)
+        ]
+    )
+
+
+def list_orders_n_plus_one(service, database):
+    # Reproduces the pre-batching handler: one item query per order row
+    conn = database.connect()
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT order_id, customer_id, total_amount, status, created_at
+        FROM orders
+        ORDER BY created_at DESC
+    """)
+    result = []
+    for order in cursor.fetchall():
+        cursor.execute("""
+            SELECT product_id, quantity, unit_price_at_purchase
+            FROM order_items
+            WHERE order_id = %s
+        """, (order['order_id'],))
+        result.append(service.serialize_order(order, cursor.fetchall()))
+    cursor.close()
+    conn.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--items-per-order", type=int, default=3)
+    parser.add_argument("--rtt-ms", type=float, default=0.2,
+                        help="simulated DB round trip added to every statement")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    database = StandInDatabase(rtt_ms=args.rtt_ms)
+    seed(database, args.orders, args.items_per_order)
+    service = load_service("order_service", database)
+    client = service.app.test_client()
+
+    def batched():
+        # The full table is only available as a stream; the JSON listing is paged
+        response = client.get("/api/orders?format=ndjson")
+        assert response.status_code == 200
+        assert len(response.get_data().splitlines()) == args.orders
+
+    report = {"orders": args.orders, "items_per_order": args.items_per_order, "rtt_ms": args.rtt_ms}
+    for label, fn in (("before_n_plus_one", lambda: list_orders_n_plus_one(service, database)),
+                      ("after_batched", batched)):
+        database.reset_counters()
+        fn()
+        queries = database.queries
+        report[label] = dict(summarize(timed(fn, args.repeat)), queries_per_request=queries)
+
+    emit(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
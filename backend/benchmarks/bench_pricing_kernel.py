@@ -0,0 +1,104 @@
+"""
+Benchmark: pricing_service's scalar line pricing vs the NumPy kernel.
+
+For each cart size, generates reproducible lines (two-decimal prices, integer
+quantities, discounts from typical rule tiers) and times
+    kernel  price_lines vs price_lines_vectorized on the same inputs
+    quote   quote_lines for a whole cart with the kernel switched off / on
+            (VECTOR_PRICING_MIN_LINES), i.e. what /api/pricing/calculate pays
+
+Every run also checks that both paths return identical line totals and
+subtotal, on the generated lines and on a set of half-cent tie values, and
+fails if they ever differ.
+
+Usage:
+    python bench_pricing_kernel.py --sizes 1000,10000,100000 --repeat 20
+"""
+import argparse
+import random
+import sys
+
+from harness import emit, load_service, summarize, timed
+
+DISCOUNT_TIERS = (0.0, 0.0, 5.0, 7.5, 10.0, 12.5, 15.0, 33.33)
+# Values whose exact product sits on, or within rounding error of, a half cent
+TIE_LINES = [
+    (0.125, 1, 0.0), (0.375, 1, 0.0), (1.005, 1, 0.0), (2.675, 1, 0.0),
+    (0.01, 5, 50.0), (0.05, 1, 10.0), (10.05, 3, 50.0), (1.15, 7, 0.0),
+    (1234567.885, 1, 0.0), (0.015, 1, 0.0), (0.025, 1, 0.0), (99.99, 9, 12.5),
+]
+
+
+def make_lines(size, rng):
+    prices = [round(rng.uniform(0.01, 500), 2) for _ in range(size)]
+    quantities = [rng.randint(1, 1000) for _ in range(size)]
+    discounts = [rng.choice(DISCOUNT_TIERS) for _ in range(size)]
+    return prices, quantities, discounts
+
+
+def same(scalar, vectorized):
+    # Compare reprs so -0.0 vs 0.0 or a last-bit difference also counts
+    (totals_a, subtotal_a), (totals_b, subtotal_b) = scalar, vectorized
+    return list(map(repr, totals_a)) == list(map(repr, totals_b)) and repr(subtotal_a) == repr(subtotal_b)
+
+
+def run_size(pricing, size, args):
+    rng = random.Random(f"{args.seed}-{size}")
+    prices, quantities, discounts = make_lines(size, rng)
+    matches = same(pricing.price_lines(prices, quantities, discounts),
+                   pricing.price_lines_vectorized(prices, quantities, discounts))
+
+    scalar = timed(lambda: pricing.price_lines(prices, quantities, discounts), args.repeat)
+    vectorized = timed(lambda: pricing.price_lines_vectorized(prices, quantities, discounts), args.repeat)
+
+    # Whole-cart pricing as the endpoint does it
+    products_list = [{"product_id": i, "quantity": qty} for i, qty in enumerate(quantities)]
+    inventory_products = {str(i): {"product_name": f"p{i}", "unit_price": price} for i, price in enumerate(prices)}
+    line_discounts = dict(enumerate(discounts))
+
+    def quote(min_lines):
+        pricing.VECTOR_PRICING_MIN_LINES = min_lines
+        return pricing.quote_lines(products_list, inventory_products,
+                                   lambda p_id, qty: line_discounts[p_id], 14.0)
+
+    matches = matches and quote(size + 1) == quote(1)
+    quote_scalar = timed(lambda: quote(size + 1), max(1, args.repeat // 4))
+    quote_vectorized = timed(lambda: quote(1), max(1, args.repeat // 4))
+
+    kernel_speedup = summarize(scalar)["p50_ms"] / max(summarize(vectorized)["p50_ms"], 1e-6)
+    quote_speedup = summarize(quote_scalar)["p50_ms"] / max(summarize(quote_vectorized)["p50_ms"], 1e-6)
+    return {
+        "lines": size,
+        "identical": matches,
+        "kernel": {"scalar": summarize(scalar), "vectorized": summarize(vectorized),
+                   "speedup": round(kernel_speedup, 2)},
+        "quote": {"scalar": summarize(quote_scalar), "vectorized": summarize(quote_vectorized),
+                  "speedup": round(quote_speedup, 2)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per path and size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    pricing = load_service("pricing_service")
+    prices, quantities, discounts = zip(*TIE_LINES)
+    ties_identical = same(pricing.price_lines(prices, quantities, discounts),
+                          pricing.price_lines_vectorized(prices, quantities, discounts))
+
+    results = [run_size(pricing, int(size), args) for size in args.sizes.split(",") if size.strip()]
+    emit({
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "ties_identical": ties_identical,
+        "results": results,
+    }, args.output)
+    sys.exit(0 if ties_identical and all(r["identical"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
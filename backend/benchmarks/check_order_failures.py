@@ -0,0 +1,211 @@
+"""
+Failure-injection checks for order_service's write paths.
+
+Runs order_service against a stand-in database and an in-process
+inventory_service, forces a database failure at a chosen point while orders
+are being saved, and verifies that every unit of reserved stock is given
+back, that no order is left behind, and that each order still gets a
+result. Exits with code 1 if any scenario fails.
+
+Usage:
+    python check_order_failures.py
+"""
+import argparse
+import sys
+
+from mysql.connector import errors
+
+from harness import emit, load_service
+from standin_db import StandInDatabase
+
+STOCK = 10
+BATCH = {"orders": [
+    {"customer_id": 1, "products": [{"product_id": 1, "quantity": 2}, {"product_id": 2, "quantity": 3}]},
+    {"customer_id": 1, "products": [{"product_id": 2, "quantity": 1}]},
+    {"customer_id": 1, "products": [{"product_id": 3, "quantity": 4}]},
+]}
+
+
+class InventoryClient:
+    """order_service's inventory_client, served by the inventory app in-process."""
+
+    class Response:
+        def __init__(self, response):
+            self.status_code = response.status_code
+            self._body = response.get_json()
+
+        def json(self):
+            return self._body
+
+    def __init__(self, app):
+        self.app = app
+
+    def _call(self, method, path, json=None, **kwargs):
+        with self.app.test_client() as client:
+            return self.Response(getattr(client, method)(path, json=json))
+
+    def get(self, path, **kwargs):
+        return self._call("get", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self._call("post", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self._call("put", path, **kwargs)
+
+
+class FailingCursor:
+    def __init__(self, cursor, injector):
+        self._cursor = cursor
+        self._injector = injector
+
+    def execute(self, sql, params=()):
+        self._injector.statement(sql)
+        return self._cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class FailingConnection:
+    def __init__(self, connection, injector):
+        self._connection = connection
+        self._injector = injector
+
+    def cursor(self, *args, **kwargs):
+        return FailingCursor(self._connection.cursor(*args, **kwargs), self._injector)
+
+    def commit(self):
+        self._injector.statement("COMMIT")
+        return self._connection.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class Injector:
+    """
+    Replaces order_service.get_db_connection. The checkouts numbered in
+    `fail_checkouts` (from 1) raise PoolError; statements starting with
+    `statement` raise OperationalError on their `nth` occurrence.
+    """
+
+    def __init__(self, database, fail_checkouts=(), statement=None, nth=1):
+        self.database = database
+        self.fail_checkouts = set(fail_checkouts)
+        self.prefix = statement
+        self.nth = nth
+        self.checkouts = 0
+        self.seen = 0
+
+    def connect(self):
+        self.checkouts += 1
+        if self.checkouts in self.fail_checkouts:
+            raise errors.PoolError("No connection available in pool 'order_service' (injected)")
+        return FailingConnection(self.database.connect(), self)
+
+    def statement(self, sql):
+        if self.prefix and sql.strip().upper().startswith(self.prefix):
+            self.seen += 1
+            if self.seen == self.nth:
+                raise errors.OperationalError(f"{self.prefix} failed (injected)")
+
+
+def setup(**injection):
+    database = StandInDatabase()
+    database.executemany(
+        "INSERT INTO inventory (product_id, product_name, quantity_available, unit_price) VALUES (%s, %s, %s, %s)",
+        [(i, f"p{i}", STOCK, 2.5) for i in range(1, 4)]
+    )
+    database.executemany("INSERT INTO customers (customer_id, name) VALUES (%s, %s)", [(1, "c")])
+    inventory = load_service("inventory_service", database)
+    orders = load_service("order_service", database)
+    orders.inventory_client = InventoryClient(inventory.app)
+    orders.get_db_connection = Injector(database, **injection).connect
+    return database, inventory, orders
+
+
+def state(database, inventory):
+    inventory.product_cache.clear()
+    with inventory.app.test_client() as client:
+        stock = [client.get(f"/api/inventory/check/{i}").get_json()["quantity_available"] for i in range(1, 4)]
+    connection = database.connect()
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM orders")
+    order_count = cursor.fetchone()[0]
+    cursor.close()
+    connection.close()
+    return stock, order_count
+
+
+def check_batch(name, **injection):
+    database, inventory, orders = setup(**injection)
+    with orders.app.test_client() as client:
+        response = client.post("/api/orders/batch", json=BATCH)
+    body = response.get_json(silent=True) or {}
+    results = body.get("results") or []
+    stock, order_count = state(database, inventory)
+    return {
+        "scenario": name,
+        "status": response.status_code,
+        "results": [result and result.get("status") for result in results],
+        "stock": stock,
+        "orders": order_count,
+        "passed": response.status_code == 200
+        and len(results) == len(BATCH["orders"])
+        and all(result and result["status"] == "failed" for result in results)
+        and stock == [STOCK] * 3
+        and order_count == 0,
+    }
+
+
+def check_idempotent_retry(name, **injection):
+    # The first attempt fails after its Idempotency-Key was claimed; the
+    # retry must run the order instead of waiting on a stuck claim
+    database, inventory, orders = setup(**injection)
+    order = {"customer_id": 1, "products": [{"product_id": 1, "quantity": 2}]}
+    headers = {"Idempotency-Key": "check-1"}
+    with orders.app.test_client() as client:
+        first = client.post("/api/orders/create", json=order, headers=headers)
+        stock_after_failure, _ = state(database, inventory)
+        retry = client.post("/api/orders/create", json=order, headers=headers)
+        replay = client.post("/api/orders/create", json=order, headers=headers)
+    stock, order_count = state(database, inventory)
+    return {
+        "scenario": name,
+        "statuses": [first.status_code, retry.status_code, replay.status_code],
+        "stock_after_failure": stock_after_failure,
+        "stock": stock,
+        "orders": order_count,
+        "passed": first.status_code == 500 and first.is_json
+        and stock_after_failure == [STOCK] * 3
+        and retry.status_code == 201
+        and replay.status_code == 201 and replay.headers.get("Idempotent-Replayed") == "true"
+        and stock == [STOCK - 2, STOCK, STOCK]
+        and order_count == 1,
+    }
+
+
+SCENARIOS = [
+    ("batch: no connection for the save", check_batch, {"fail_checkouts": [1]}),
+    ("batch: second savepoint fails", check_batch, {"statement": "SAVEPOINT", "nth": 2}),
+    ("batch: commit fails", check_batch, {"statement": "COMMIT"}),
+    # Checkout 1 claims the key, checkout 2 is place_order's
+    ("create: no connection after the key is claimed", check_idempotent_retry, {"fail_checkouts": [2]}),
+    ("create: order insert fails after the key is claimed", check_idempotent_retry,
+     {"statement": "INSERT INTO ORDERS"}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    results = [check(name, **injection) for name, check, injection in SCENARIOS]
+    emit({"results": results}, args.output)
+    sys.exit(0 if all(result["passed"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
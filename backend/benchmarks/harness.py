@@ -0,0 +1,61 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Every service lives in its own app.py, so services are loaded by path under a
+unique module name and pointed at a StandInDatabase.
+"""
+import importlib.util
+import json
+import os
+import statistics
+import time
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "services")
+
+
+def load_service(name, database=None):
+    """Import backend/services/<name>/app.py and optionally wire it to `database`."""
+    path = os.path.join(SERVICES_DIR, name, "app.py")
+    spec = importlib.util.spec_from_file_location(f"bench_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if database is not None:
+        module.get_db_connection = database.connect
+    return module
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples_s):
+    """Latency summary in milliseconds for a list of durations in seconds."""
+    samples_ms = [s * 1000.0 for s in samples_s]
+    return {
+        "runs": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+    }
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def emit(report, output=None):
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, "w") as fh:
+            fh.write(text + "\n")
+    print(text)
@@ -0,0 +1,341 @@
+"""
+Local stand-in for the ecommerce_system MySQL database.
+
+Benchmarks swap a service's get_db_connection() for StandInDatabase.connect so
+the real endpoint code runs unchanged against an in-memory SQLite copy of the
+schema. Every statement is counted, and an optional per-statement delay
+(rtt_ms) models the network round trip to a real MySQL server.
+"""
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from mysql.connector import errors
+
+SCHEMA = """
+CREATE TABLE customers (
+    customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT,
+    phone TEXT,
+    loyalty_points INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE inventory (
+    product_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_name TEXT NOT NULL,
+    quantity_available INTEGER NOT NULL DEFAULT 0,
+    quantity_reserved INTEGER NOT NULL DEFAULT 0,
+    unit_price DECIMAL(10, 2) NOT NULL,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    available_to_sell INTEGER GENERATED ALWAYS AS (quantity_available - quantity_reserved) STORED
+);
+CREATE INDEX idx_inventory_name ON inventory (product_name, product_id);
+CREATE INDEX idx_inventory_price ON inventory (unit_price, product_id);
+CREATE INDEX idx_inventory_available ON inventory (available_to_sell, product_id);
+CREATE TABLE stock_reservations (
+    reservation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    status TEXT NOT NULL DEFAULT 'ACTIVE',
+    expires_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_stock_reservations_status_expires ON stock_reservations (status, expires_at);
+CREATE TABLE stock_reservation_items (
+    reservation_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (reservation_id, product_id)
+);
+CREATE TABLE inventory_changes (
+    change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL,
+    change_type TEXT NOT NULL,
+    product_name TEXT NOT NULL,
+    quantity_available INTEGER NOT NULL,
+    quantity_reserved INTEGER NOT NULL,
+    unit_price DECIMAL(10, 2) NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TRIGGER inventory_after_update AFTER UPDATE ON inventory
+WHEN NEW.quantity_available <> OLD.quantity_available
+  OR NEW.quantity_reserved <> OLD.quantity_reserved
+  OR NEW.unit_price <> OLD.unit_price
+  OR NEW.product_name <> OLD.product_name
+BEGIN
+    INSERT INTO inventory_changes
+        (product_id, change_type, product_name, quantity_available, quantity_reserved, unit_price)
+    VALUES (NEW.product_id,
+            CASE
+                WHEN NEW.unit_price <> OLD.unit_price THEN 'PRICE'
+                WHEN NEW.quantity_available = OLD.quantity_available THEN 'RESERVATION'
+                ELSE 'STOCK'
+            END,
+            NEW.product_name, NEW.quantity_available, NEW.quantity_reserved, NEW.unit_price);
+END;
+CREATE TABLE orders (
+    order_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_id INTEGER NOT NULL,
+    total_amount DECIMAL(10, 2) NOT NULL,
+    status TEXT NOT NULL DEFAULT 'PENDING',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_orders_customer ON orders (customer_id);
+CREATE TABLE order_items (
+    order_item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_price_at_purchase DECIMAL(10, 2) NOT NULL
+);
+CREATE INDEX idx_order_items_order ON order_items (order_id);
+CREATE TABLE pricing_rules (
+    rule_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL,
+    min_quantity INTEGER NOT NULL,
+    discount_percentage DECIMAL(5, 2) NOT NULL
+);
+CREATE TABLE pricing_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO pricing_versions (name) VALUES ('pricing_rules');
+CREATE TRIGGER pricing_rules_after_insert AFTER INSERT ON pricing_rules BEGIN
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'pricing_rules';
+END;
+CREATE TRIGGER pricing_rules_after_update AFTER UPDATE ON pricing_rules BEGIN
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'pricing_rules';
+END;
+CREATE TRIGGER pricing_rules_after_delete AFTER DELETE ON pricing_rules BEGIN
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'pricing_rules';
+END;
+CREATE TABLE tax_rates (
+    region TEXT PRIMARY KEY,
+    tax_rate DECIMAL(5, 2) NOT NULL
+);
+INSERT INTO pricing_versions (name) VALUES ('tax_rates');
+CREATE TRIGGER tax_rates_after_insert AFTER INSERT ON tax_rates BEGIN
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'tax_rates';
+END;
+CREATE TRIGGER tax_rates_after_update AFTER UPDATE ON tax_rates BEGIN
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'tax_rates';
+END;
+CREATE TRIGGER tax_rates_after_delete AFTER DELETE ON tax_rates BEGIN
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'tax_rates';
+END;
+CREATE TABLE idempotency_keys (
+    idempotency_key TEXT PRIMARY KEY,
+    request_hash TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'IN_PROGRESS',
+    response_status INTEGER,
+    response_body TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE sales_daily (
+    sales_date TEXT PRIMARY KEY,
+    orders_count INTEGER NOT NULL DEFAULT 0,
+    units_sold INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0
+);
+CREATE TABLE sales_product_daily (
+    sales_date TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    units_sold INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sales_date, product_id)
+);
+CREATE TABLE sales_customer_daily (
+    sales_date TEXT NOT NULL,
+    customer_id INTEGER NOT NULL,
+    orders_count INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sales_date, customer_id)
+);
+CREATE TABLE notification_log (
+    notification_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INTEGER,
+    customer_id INTEGER,
+    notification_type TEXT,
+    message TEXT,
+    sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+_PLACEHOLDER = re.compile(r"%s")
+_TRAILING_COMMENT = re.compile(r"#[^\n]*")
+_FOR_UPDATE = re.compile(r"\bFOR\s+UPDATE(\s+SKIP\s+LOCKED)?\b", re.IGNORECASE)
+_LAST_INSERT_ID = re.compile(r"\bLAST_INSERT_ID\(([^()]+)\)", re.IGNORECASE)
+_ON_DUPLICATE_KEY = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_VALUES_OF = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+_SECONDS_BETWEEN = re.compile(r"\bTIMESTAMPDIFF\(\s*SECOND\s*,\s*(\w+(?:\(\))?)\s*,\s*(\w+(?:\(\))?)\s*\)",
+                              re.IGNORECASE)
+
+
+def _translate(sql):
+    # MySQL -> SQLite: paramstyle, '#' comments, row locks (SQLite
+    # serializes writers anyway), LAST_INSERT_ID(expr), upserts and
+    # TIMESTAMPDIFF(SECOND, ...) are the differences the service queries hit.
+    # lastrowid does not reflect LAST_INSERT_ID(expr).
+    sql = _FOR_UPDATE.sub("", _PLACEHOLDER.sub("?", sql))
+    sql = _LAST_INSERT_ID.sub(r"(\1)", sql)
+    sql = _ON_DUPLICATE_KEY.sub("ON CONFLICT DO UPDATE SET", sql)
+    sql = _VALUES_OF.sub(r"excluded.\1", sql)
+    sql = _SECONDS_BETWEEN.sub(r"CAST((julianday(\2) - julianday(\1)) * 86400 AS INTEGER)", sql)
+    return _TRAILING_COMMENT.sub("", sql)
+
+
+def _mysql_error(err):
+    # Services catch mysql.connector errors, so raise those
+    if isinstance(err, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=str(err), errno=1062)
+    return errors.DatabaseError(msg=str(err))
+
+
+def _convert(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+sqlite3.register_converter("DECIMAL", lambda raw: Decimal(raw.decode()))
+sqlite3.register_converter("TIMESTAMP", lambda raw: datetime.fromisoformat(raw.decode()))
+
+
+class StandInCursor:
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection._sqlite.cursor()
+        self._dictionary = dictionary
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def execute(self, sql, params=()):
+        self._connection._database._record()
+        try:
+            self._cursor.execute(_translate(sql), tuple(_convert(p) for p in params or ()))
+        except sqlite3.Error as err:
+            raise _mysql_error(err) from err
+
+    def executemany(self, sql, seq_of_params):
+        self._connection._database._record()
+        try:
+            self._cursor.executemany(
+                _translate(sql),
+                [tuple(_convert(p) for p in params) for params in seq_of_params]
+            )
+        except sqlite3.Error as err:
+            raise _mysql_error(err) from err
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {col[0]: value for col, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for row in self._cursor:
+            yield self._row(row)
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandInConnection:
+    def __init__(self, database):
+        self._database = database
+        self._sqlite = sqlite3.connect(
+            database.uri,
+            uri=True,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+            timeout=30
+        )
+        self._sqlite.create_function("NOW", 0, lambda: datetime.now().isoformat(" "))
+        self._sqlite.create_function("CURDATE", 0, lambda: date.today().isoformat())
+        self._open = True
+
+    def cursor(self, dictionary=False, buffered=None):
+        return StandInCursor(self, dictionary=dictionary)
+
+    def commit(self):
+        self._sqlite.commit()
+
+    def rollback(self):
+        self._sqlite.rollback()
+
+    def is_connected(self):
+        return self._open
+
+    def close(self):
+        if self._open:
+            self._sqlite.close()
+            self._open = False
+
+
+class StandInDatabase:
+    """
+    Shared database; connect() is a drop-in get_db_connection.
+
+    In memory by default. Pass `path` for a WAL-mode file database when many
+    threads write at once: shared-cache memory databases fail concurrent
+    writers immediately instead of making them wait.
+    """
+
+    _counter = 0
+
+    def __init__(self, rtt_ms=0.0, path=None):
+        StandInDatabase._counter += 1
+        if path:
+            self.uri = f"file:{path}"
+        else:
+            self.uri = f"file:standin_{StandInDatabase._counter}?mode=memory&cache=shared"
+        self.rtt = rtt_ms / 1000.0
+        self.queries = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        # Keeps the shared in-memory database alive for the object's lifetime
+        self._anchor = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        if path:
+            self._anchor.execute("PRAGMA journal_mode=WAL")
+        self._anchor.executescript(SCHEMA)
+
+    def _record(self):
+        with self._lock:
+            self.queries += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def connect(self):
+        with self._lock:
+            self.connections += 1
+        return StandInConnection(self)
+
+    def executescript(self, script):
+        self._anchor.executescript(script)
+
+    def executemany(self, sql, rows):
+        self._anchor.executemany(_translate(sql), rows)
+        self._anchor.commit()
+
+    def reset_counters(self):
+        with self._lock:
+            self.queries = 0
+            self.connections = 0
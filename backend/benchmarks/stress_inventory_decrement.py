@@ -0,0 +1,117 @@
+"""
+Concurrency stress check for PUT /api/inventory/update.
+
+Many threads decrement the same product one unit at a time until its stock
+runs out. The run fails (exit code 1) if the final stock is negative or does
+not equal the starting stock minus the number of successful decrements.
+
+Usage:
+    python stress_inventory_decrement.py --threads 32 --stock 500
+    python stress_inventory_decrement.py --url http://localhost:5002 --product-id 1
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+from harness import emit, load_service
+from standin_db import StandInDatabase
+
+
+class InProcessTarget:
+    """inventory_service app backed by a fresh stand-in database."""
+
+    def __init__(self, stock):
+        self._tmp = tempfile.TemporaryDirectory()
+        database = StandInDatabase(path=os.path.join(self._tmp.name, "stress.db"))
+        database.executemany(
+            "INSERT INTO inventory (product_id, product_name, quantity_available, unit_price) VALUES (%s, %s, %s, %s)",
+            [(1, "Hot SKU", stock, 9.99)]
+        )
+        self.product_id = 1
+        self.service = load_service("inventory_service", database)
+        self.app = self.service.app
+
+    def decrement(self, product_id):
+        with self.app.test_client() as client:
+            return client.put("/api/inventory/update",
+                              json={"product_id": product_id, "quantity_change": -1}).status_code
+
+    def stock(self, product_id):
+        # Bypass the product cache so the row is read back from the database
+        self.service.product_cache.clear()
+        with self.app.test_client() as client:
+            return client.get(f"/api/inventory/check?ids={product_id}").get_json()["products"][str(product_id)]["quantity_available"]
+
+
+class HttpTarget:
+    """A running inventory_service (real MySQL) reached over HTTP."""
+
+    def __init__(self, url, product_id):
+        import requests
+        self._session = requests.Session()
+        self._url = url.rstrip("/")
+        self.product_id = product_id
+
+    def decrement(self, product_id):
+        return self._session.put(f"{self._url}/api/inventory/update",
+                                 json={"product_id": product_id, "quantity_change": -1}, timeout=30).status_code
+
+    def stock(self, product_id):
+        return self._session.get(f"{self._url}/api/inventory/check/{product_id}",
+                                 timeout=30).json()["quantity_available"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--stock", type=int, default=500, help="starting stock (in-process mode)")
+    parser.add_argument("--attempts-factor", type=float, default=1.5,
+                        help="total decrement attempts as a multiple of the starting stock")
+    parser.add_argument("--url", help="hammer a running inventory_service instead of an in-process app")
+    parser.add_argument("--product-id", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    target = HttpTarget(args.url, args.product_id) if args.url else InProcessTarget(args.stock)
+    product_id = target.product_id
+    start_stock = target.stock(product_id)
+    attempts = max(args.threads, int(start_stock * args.attempts_factor))
+
+    outcomes = {"ok": 0, "insufficient": 0, "errors": 0}
+    lock = threading.Lock()
+    remaining = [attempts]
+
+    def worker():
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            status = target.decrement(product_id)
+            key = "ok" if status == 200 else "insufficient" if status == 400 else "errors"
+            with lock:
+                outcomes[key] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    final_stock = target.stock(product_id)
+    passed = final_stock >= 0 and final_stock == start_stock - outcomes["ok"]
+    emit({
+        "threads": args.threads,
+        "attempts": attempts,
+        "start_stock": start_stock,
+        "final_stock": final_stock,
+        "outcomes": outcomes,
+        "passed": passed,
+    }, args.output)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
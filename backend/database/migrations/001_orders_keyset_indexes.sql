@@ -0,0 +1,7 @@
+-- Keyset pagination for GET /api/orders (order_service).
+-- Pages are read newest first with (created_at, order_id) as the cursor.
+
+USE ecommerce_system;
+
+CREATE INDEX idx_orders_created_order ON orders (created_at, order_id);
+CREATE INDEX idx_orders_customer_created_order ON orders (customer_id, created_at, order_id);
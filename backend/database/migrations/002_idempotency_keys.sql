@@ -0,0 +1,16 @@
+-- Idempotency-Key support for POST /api/orders/create (order_service).
+-- One row per key: IN_PROGRESS while the first request runs, then COMPLETED
+-- with the response that every retry of the same key gets back.
+
+USE ecommerce_system;
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    idempotency_key VARCHAR(255) NOT NULL PRIMARY KEY,
+    request_hash CHAR(64) NOT NULL,
+    status ENUM('IN_PROGRESS', 'COMPLETED') NOT NULL DEFAULT 'IN_PROGRESS',
+    response_status SMALLINT NULL,
+    response_body JSON NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_idempotency_keys_created (created_at)
+);
@@ -0,0 +1,55 @@
+-- Sales rollups for GET /api/orders/stats (order_service).
+-- Rows are incremented in the same transaction that inserts an order, so
+-- reporting never has to scan orders / order_items.
+
+USE ecommerce_system;
+
+CREATE TABLE IF NOT EXISTS sales_daily (
+    sales_date DATE NOT NULL PRIMARY KEY,
+    orders_count INT NOT NULL DEFAULT 0,
+    units_sold BIGINT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS sales_product_daily (
+    sales_date DATE NOT NULL,
+    product_id INT NOT NULL,
+    units_sold BIGINT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sales_date, product_id)
+);
+
+CREATE TABLE IF NOT EXISTS sales_customer_daily (
+    sales_date DATE NOT NULL,
+    customer_id INT NOT NULL,
+    orders_count INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (sales_date, customer_id)
+);
+
+-- One-off backfill from existing orders. Run once, before the updated
+-- order_service starts writing to the rollups.
+INSERT INTO sales_daily (sales_date, orders_count, units_sold, revenue)
+SELECT d.sales_date, d.orders_count, COALESCE(u.units_sold, 0), d.revenue
+FROM (
+    SELECT DATE(created_at) AS sales_date, COUNT(*) AS orders_count, SUM(total_amount) AS revenue
+    FROM orders
+    GROUP BY DATE(created_at)
+) d
+LEFT JOIN (
+    SELECT DATE(o.created_at) AS sales_date, SUM(oi.quantity) AS units_sold
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.order_id
+    GROUP BY DATE(o.created_at)
+) u ON u.sales_date = d.sales_date;
+
+INSERT INTO sales_product_daily (sales_date, product_id, units_sold, revenue)
+SELECT DATE(o.created_at), oi.product_id, SUM(oi.quantity), SUM(oi.quantity * oi.unit_price_at_purchase)
+FROM orders o
+JOIN order_items oi ON oi.order_id = o.order_id
+GROUP BY DATE(o.created_at), oi.product_id;
+
+INSERT INTO sales_customer_daily (sales_date, customer_id, orders_count, revenue)
+SELECT DATE(created_at), customer_id, COUNT(*), SUM(total_amount)
+FROM orders
+GROUP BY DATE(created_at), customer_id;
@@ -0,0 +1,27 @@
+-- Time-limited stock reservations (inventory_service).
+-- inventory.quantity_reserved is the total held by ACTIVE reservations.
+-- Available-to-sell is quantity_available - quantity_reserved, so reads do
+-- not need to aggregate the holds.
+
+USE ecommerce_system;
+
+ALTER TABLE inventory
+    ADD COLUMN quantity_reserved INT NOT NULL DEFAULT 0 AFTER quantity_available;
+
+CREATE TABLE IF NOT EXISTS stock_reservations (
+    reservation_id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    status ENUM('ACTIVE', 'COMMITTED', 'RELEASED', 'EXPIRED') NOT NULL DEFAULT 'ACTIVE',
+    expires_at DATETIME NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- The sweeper scans ACTIVE rows by expiry
+    INDEX idx_stock_reservations_status_expires (status, expires_at)
+);
+
+CREATE TABLE IF NOT EXISTS stock_reservation_items (
+    reservation_id BIGINT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+    PRIMARY KEY (reservation_id, product_id),
+    FOREIGN KEY (reservation_id) REFERENCES stock_reservations (reservation_id),
+    FOREIGN KEY (product_id) REFERENCES inventory (product_id)
+);
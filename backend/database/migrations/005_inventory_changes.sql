@@ -0,0 +1,19 @@
+-- Inventory change feed (inventory_service).
+-- Every write to an inventory row appends the row's new state here in the
+-- same transaction. change_id is the feed sequence consumers resume from
+-- (GET /api/inventory/changes?since=<change_id>).
+
+USE ecommerce_system;
+
+CREATE TABLE IF NOT EXISTS inventory_changes (
+    change_id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    product_id INT NOT NULL,
+    change_type ENUM('STOCK', 'RESERVATION', 'PRICE') NOT NULL,
+    product_name VARCHAR(255) NOT NULL,
+    quantity_available INT NOT NULL,
+    quantity_reserved INT NOT NULL,
+    unit_price DECIMAL(10, 2) NOT NULL,
+    changed_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    -- The sweeper prunes by age
+    INDEX idx_inventory_changes_changed_at (changed_at)
+);
@@ -0,0 +1,12 @@
+-- Product listing and search (GET /api/inventory/products).
+-- available_to_sell is stored so the in_stock and low-stock filters can use
+-- an index instead of computing quantity_available - quantity_reserved for
+-- every row. Each index ends with product_id, the keyset tie-breaker.
+
+USE ecommerce_system;
+
+ALTER TABLE inventory
+    ADD COLUMN available_to_sell INT AS (quantity_available - quantity_reserved) STORED,
+    ADD INDEX idx_inventory_name (product_name, product_id),
+    ADD INDEX idx_inventory_price (unit_price, product_id),
+    ADD INDEX idx_inventory_available (available_to_sell, product_id);
@@ -0,0 +1,21 @@
+-- Version counters for the pricing tables (pricing_service).
+-- pricing_service keeps pricing_rules in memory and polls this table to
+-- decide when to reload. The triggers bump the counter on every change,
+-- including edits made by hand in a SQL console.
+
+USE ecommerce_system;
+
+CREATE TABLE IF NOT EXISTS pricing_versions (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+INSERT IGNORE INTO pricing_versions (name) VALUES ('pricing_rules');
+
+CREATE TRIGGER pricing_rules_after_insert AFTER INSERT ON pricing_rules FOR EACH ROW
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'pricing_rules';
+CREATE TRIGGER pricing_rules_after_update AFTER UPDATE ON pricing_rules FOR EACH ROW
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'pricing_rules';
+CREATE TRIGGER pricing_rules_after_delete AFTER DELETE ON pricing_rules FOR EACH ROW
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'pricing_rules';
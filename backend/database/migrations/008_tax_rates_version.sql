@@ -0,0 +1,13 @@
+-- Version counter for tax_rates (pricing_service keeps the rates in memory).
+-- Same scheme as 007_pricing_versions.sql.
+
+USE ecommerce_system;
+
+INSERT IGNORE INTO pricing_versions (name) VALUES ('tax_rates');
+
+CREATE TRIGGER tax_rates_after_insert AFTER INSERT ON tax_rates FOR EACH ROW
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'tax_rates';
+CREATE TRIGGER tax_rates_after_update AFTER UPDATE ON tax_rates FOR EACH ROW
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'tax_rates';
+CREATE TRIGGER tax_rates_after_delete AFTER DELETE ON tax_rates FOR EACH ROW
+    UPDATE pricing_versions SET version = version + 1 WHERE name = 'tax_rates';
@@ -0,0 +1,29 @@
+-- Writes the inventory change feed (005_inventory_changes.sql) from a
+-- trigger instead of from inventory_service, so a stock update costs one
+-- statement rather than UPDATE + SELECT + INSERT. The row is appended in
+-- the writing statement's transaction, including edits made by hand in a
+-- SQL console. Updates that leave the product's state unchanged (e.g. only
+-- last_updated) append nothing.
+--
+-- change_type: 'PRICE' if the price changed, 'RESERVATION' if only
+-- quantity_reserved changed, 'STOCK' otherwise. Each firing inserts at most
+-- one row, so InnoDB allocates exactly one change_id per row and the
+-- trigger leaves no auto-increment gaps of its own.
+
+USE ecommerce_system;
+
+CREATE TRIGGER inventory_after_update AFTER UPDATE ON inventory FOR EACH ROW
+    INSERT INTO inventory_changes
+        (product_id, change_type, product_name, quantity_available, quantity_reserved, unit_price)
+    SELECT NEW.product_id,
+           CASE
+               WHEN NEW.unit_price <> OLD.unit_price THEN 'PRICE'
+               WHEN NEW.quantity_available = OLD.quantity_available THEN 'RESERVATION'
+               ELSE 'STOCK'
+           END,
+           NEW.product_name, NEW.quantity_available, NEW.quantity_reserved, NEW.unit_price
+    FROM DUAL
+    WHERE NEW.quantity_available <> OLD.quantity_available
+       OR NEW.quantity_reserved <> OLD.quantity_reserved
+       OR NEW.unit_price <> OLD.unit_price
+       OR NEW.product_name <> OLD.product_name;
@@ -3,6 +3,13 @@ import mysql.connector
 from mysql.connector import Error
 import requests
 from datetime import datetime
+import os
+import sys
+
+# backend/services holds the helpers shared by every service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.db import ConnectionPool
+from shared.http_client import get_client
 
 app = Flask(__name__)
 
@@ -15,16 +22,21 @@ DB_CONFIG = {
 }
 
 # Order Service Configuration
-ORDER_SERVICE_URL = "http://localhost:5001"
+ORDER_SERVICE_URL = os.environ.get('ORDER_SERVICE_URL', "http://localhost:5001")
+order_client = get_client(ORDER_SERVICE_URL)
 
 # ============================================
 # DATABASE CONNECTION HELPER
 # ============================================
+db_pool = ConnectionPool(DB_CONFIG, pool_name='customer_service')
+
 def get_db_connection():
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        connection = db_pool.get_connection()
         if connection.is_connected():
             return connection
+        # Give the slot back instead of dropping the dead connection
+        connection.close()
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
@@ -42,7 +54,8 @@ def health_check():
         "status": "healthy",
         "service": "Customer Service",
         "port": 5004,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "db_pool": db_pool.stats()
     }), 200
 
 # ============================================
@@ -141,7 +154,7 @@ def get_customer_orders(customer_id):
             order_service_endpoint = f"{ORDER_SERVICE_URL}/api/orders" # Does this endpoint even exist in Order Service? <<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<
             params = {"customer_id": customer_id}
             
-            response = requests.get(
+            response = order_client.get(
                 order_service_endpoint,
                 params=params,
                 timeout=5 
@@ -1,7 +1,22 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 import mysql.connector
 from mysql.connector import Error
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal
+import base64
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+# backend/services holds the helpers shared by every service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.cache import LRUCache
+from shared.db import ConnectionPool
 
 app = Flask(__name__)
 
@@ -16,19 +31,95 @@ DB_CONFIG = {
 # ============================================
 # DATABASE CONNECTION HELPER
 # ============================================
+db_pool = ConnectionPool(DB_CONFIG, pool_name='inventory_service')
+
 def get_db_connection():
     """
-    Creates and returns a MySQL database connection.
-    Returns None if connection fails.
+    Checks out a MySQL connection from the service pool.
+    Returns None if no healthy connection is available.
     """
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
+        connection = db_pool.get_connection()
         if connection.is_connected():
             return connection
+        # Give the slot back instead of dropping the dead connection
+        connection.close()
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
 
+# ============================================
+# PRODUCT CACHE
+# ============================================
+# check_inventory rows keyed by product_id. Writes made by this process
+# invalidate their entries; the TTL bounds staleness for writes made by
+# other processes.
+PRODUCT_CACHE_SIZE = int(os.environ.get('PRODUCT_CACHE_SIZE', 10000))
+PRODUCT_CACHE_TTL = float(os.environ.get('PRODUCT_CACHE_TTL', 5))
+product_cache = LRUCache(PRODUCT_CACHE_SIZE, ttl=PRODUCT_CACHE_TTL)
+
+# Stock reservations
+RESERVATION_DEFAULT_TTL = int(os.environ.get('RESERVATION_DEFAULT_TTL', 900))
+RESERVATION_MAX_TTL = int(os.environ.get('RESERVATION_MAX_TTL', 3600))
+RESERVATION_SWEEP_INTERVAL = float(os.environ.get('RESERVATION_SWEEP_INTERVAL', 30))
+RESERVATION_SWEEP_BATCH = int(os.environ.get('RESERVATION_SWEEP_BATCH', 500))
+
+# Flash-sale mode
+FLASH_SALE_CHUNK_SIZE = int(os.environ.get('FLASH_SALE_CHUNK_SIZE', 100))
+FLASH_SALE_FLUSH_INTERVAL = float(os.environ.get('FLASH_SALE_FLUSH_INTERVAL', 0.05))
+
+# Upper bound for one multi-product check request
+MAX_CHECK_IDS = int(os.environ.get('MAX_CHECK_IDS', 1000))
+
+# Product listing
+PRODUCT_PAGE_SIZE = int(os.environ.get('PRODUCT_PAGE_SIZE', 100))
+PRODUCT_MAX_PAGE_SIZE = int(os.environ.get('PRODUCT_MAX_PAGE_SIZE', 1000))
+PRODUCT_STREAM_CHUNK_SIZE = int(os.environ.get('PRODUCT_STREAM_CHUNK_SIZE', 500))
+LOW_STOCK_THRESHOLD = int(os.environ.get('LOW_STOCK_THRESHOLD', 10))
+
+# Bulk import
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 500))
+IMPORT_FORMATS = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson', 'application/jsonl': 'ndjson'}
+
+# Change feed
+CHANGE_FEED_PAGE_SIZE = int(os.environ.get('CHANGE_FEED_PAGE_SIZE', 500))
+CHANGE_FEED_MAX_PAGE_SIZE = int(os.environ.get('CHANGE_FEED_MAX_PAGE_SIZE', 5000))
+CHANGE_FEED_MAX_WAIT = float(os.environ.get('CHANGE_FEED_MAX_WAIT', 30))
+CHANGE_FEED_POLL_INTERVAL = float(os.environ.get('CHANGE_FEED_POLL_INTERVAL', 0.5))
+CHANGE_FEED_GAP_GRACE = float(os.environ.get('CHANGE_FEED_GAP_GRACE', 2))
+CHANGE_FEED_HEARTBEAT = float(os.environ.get('CHANGE_FEED_HEARTBEAT', 15))
+CHANGE_FEED_RETENTION_HOURS = int(os.environ.get('CHANGE_FEED_RETENTION_HOURS', 72))
+
+def finish_product(product):
+    """
+    Prepares an inventory row for JSON. quantity_available is stock on hand;
+    quantity_reserved is held by active reservations, so only the difference
+    can be sold.
+    """
+    # Convert Decimal to float for JSON serialization
+    product['unit_price'] = float(product['unit_price'])
+    
+    # Add stock status
+    product['available_to_sell'] = product['quantity_available'] - product['quantity_reserved']
+    product['in_stock'] = product['available_to_sell'] > 0
+    return product
+
+def product_etag(product):
+    # Changes whenever the row does, even for two updates in the same second
+    return (f"{product['product_id']}-{product['last_updated'].timestamp():.0f}-"
+            f"{product['quantity_available']}-{product['quantity_reserved']}-{product['unit_price']}")
+
+def product_response(product):
+    """
+    200 with ETag / Last-Modified derived from last_updated, or 304 when the
+    request's If-None-Match / If-Modified-Since still matches.
+    """
+    response = jsonify(product)
+    if product.get('last_updated'):
+        response.set_etag(product_etag(product))
+        response.last_modified = product['last_updated']
+    return response.make_conditional(request)
+
 # ============================================
 # HEALTH CHECK ENDPOINT (OPTIONAL BUT USEFUL)
 # ============================================
@@ -42,7 +133,9 @@ def health_check():
         "status": "healthy",
         "service": "Inventory Service",
         "port": 5002,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "db_pool": db_pool.stats(),
+        "product_cache": product_cache.stats()
     }), 200
 
 # ============================================
@@ -56,11 +149,19 @@ def check_inventory(product_id):
     URL: GET /api/inventory/check/{product_id}
     Example: GET /api/inventory/check/1
     
+    Responses carry ETag / Last-Modified; send If-None-Match or
+    If-Modified-Since to get a 304 when the product is unchanged.
+    
     Returns:
         200: Product details (product_id, name, quantity, price)
+        304: Not modified
         404: Product not found
         500: Database error
     """
+    product = product_cache.get(product_id)
+    if product is not None:
+        return product_response(product)
+    
     connection = get_db_connection()
     
     if not connection:
@@ -77,6 +178,7 @@ def check_inventory(product_id):
                 product_id,
                 product_name,
                 quantity_available,
+                quantity_reserved,
                 unit_price,
                 last_updated
             FROM inventory 
@@ -90,13 +192,9 @@ def check_inventory(product_id):
         connection.close()
         
         if product:
-            # Convert Decimal to float for JSON serialization
-            product['unit_price'] = float(product['unit_price'])
-            
-            # Add stock status
-            product['in_stock'] = product['quantity_available'] > 0
-            
-            return jsonify(product), 200
+            finish_product(product)
+            product_cache.set(product_id, product)
+            return product_response(product)
         else:
             return jsonify({
                 "error": "Product not found",
@@ -128,6 +226,9 @@ def update_inventory():
         "quantity_change": -5  (negative = decrease, positive = increase)
     }
     
+    The update never reads the row, so product_name in a success response
+    is taken from the product cache and is null if the product is not cached.
+    
     Returns:
         200: Update successful
         400: Invalid input or insufficient stock
@@ -164,6 +265,13 @@ def update_inventory():
             "quantity_change": "must be integer"
         }), 400
     
+    # Decrements of flash-sale products are served from the in-process allocation
+    allocator = hot_skus.get(product_id)
+    if allocator is not None and quantity_change < 0:
+        response = flash_sale_decrement(allocator, -quantity_change)
+        if response is not None:
+            return response
+    
     connection = get_db_connection()
     
     if not connection:
@@ -174,116 +282,1896 @@ def update_inventory():
     try:
         cursor = connection.cursor(dictionary=True)
         
-        # First, check if product exists and get current quantity
+        # Check and apply the change in one statement: the row is only updated
+        # if available-to-sell stock (on hand minus reservations) stays
+        # non-negative, so concurrent buyers cannot oversell.
+        # LAST_INSERT_ID(expr) hands the new quantity back as lastrowid
+        # without a second round trip.
+        update_query = """
+            UPDATE inventory 
+            SET quantity_available = LAST_INSERT_ID(quantity_available + %s),
+                last_updated = CURRENT_TIMESTAMP
+            WHERE product_id = %s AND quantity_available - quantity_reserved + %s >= 0
+        """
+        cursor.execute(update_query, (quantity_change, product_id, quantity_change))
+        updated = cursor.rowcount == 1
+        new_quantity = cursor.lastrowid or 0
+        connection.commit()
+        
+        if updated:
+            announce_changes()
+            cached = product_cache.pop(product_id)
+            cursor.close()
+            connection.close()
+            
+            return jsonify({
+                "message": "Inventory updated successfully",
+                "product_id": product_id,
+                "product_name": cached['product_name'] if cached else None,
+                "previous_quantity": new_quantity - quantity_change,
+                "quantity_change": quantity_change,
+                "new_quantity": new_quantity
+            }), 200
+        
+        # Nothing was updated: the product is missing or stock is too low
         check_query = """
-            SELECT product_id, product_name, quantity_available 
+            SELECT product_id, product_name, quantity_available, quantity_reserved 
             FROM inventory 
             WHERE product_id = %s
         """
         cursor.execute(check_query, (product_id,))
         product = cursor.fetchone()
+        cursor.close()
+        connection.close()
         
         if not product:
-            cursor.close()
-            connection.close()
             return jsonify({
                 "error": "Product not found",
                 "product_id": product_id
             }), 404
         
         current_quantity = product['quantity_available']
-        new_quantity = current_quantity + quantity_change
+        available = current_quantity - product['quantity_reserved']
+        if available + quantity_change >= 0:
+            # A zero change within the same second leaves the row untouched
+            return jsonify({
+                "message": "Inventory updated successfully",
+                "product_id": product_id,
+                "product_name": product['product_name'],
+                "previous_quantity": current_quantity,
+                "quantity_change": quantity_change,
+                "new_quantity": current_quantity
+            }), 200
         
-        # Check if update would result in negative quantity
-        if new_quantity < 0:
-            cursor.close()
+        return jsonify({
+            "error": "Insufficient stock",
+            "product_id": product_id,
+            "product_name": product['product_name'],
+            "current_quantity": current_quantity,
+            "reserved_quantity": product['quantity_reserved'],
+            "requested_change": quantity_change,
+            "shortage": abs(available + quantity_change)
+        }), 400
+        
+    except Error as e:
+        if connection:
+            connection.rollback()
+        return jsonify({
+            "error": "Database update failed",
+            "details": str(e)
+        }), 500
+    finally:
+        if connection and connection.is_connected():
             connection.close()
-            return jsonify({
-                "error": "Insufficient stock",
+
+# ============================================
+# ENDPOINT 3: BATCH RESERVE / RESTOCK (POST)
+# ============================================
+def parse_batch_items(data):
+    """
+    Validates {"items": [{"product_id": 1, "quantity": 2}, ...]} and returns
+    {product_id: total_quantity} (repeated products are summed), or None.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('items'), list) or not data['items']:
+        return None
+    
+    quantities = {}
+    try:
+        for item in data['items']:
+            product_id = int(item['product_id'])
+            quantity = int(item['quantity'])
+            if quantity <= 0:
+                return None
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+    except (KeyError, TypeError, ValueError):
+        return None
+    return quantities
+
+def lock_products(cursor, quantities, check_stock):
+    """
+    Locks the inventory rows of every product in `quantities` (in primary key
+    order, so concurrent batches cannot deadlock) inside the caller's
+    transaction. With check_stock, every product must have at least the
+    requested quantity available to sell.
+    Returns ({product_id: row}, None) or (None, error response).
+    """
+    product_ids = sorted(quantities)
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    lock_query = f"""
+        SELECT product_id, product_name, quantity_available, quantity_reserved, unit_price
+        FROM inventory
+        WHERE product_id IN ({placeholders})
+        ORDER BY product_id
+        FOR UPDATE
+    """
+    cursor.execute(lock_query, tuple(product_ids))
+    products = {row['product_id']: row for row in cursor.fetchall()}
+    
+    missing = [product_id for product_id in product_ids if product_id not in products]
+    if missing:
+        return None, (jsonify({
+            "error": "Product not found",
+            "missing_product_ids": missing
+        }), 404)
+    
+    if not check_stock:
+        return products, None
+    
+    shortages = []
+    for product_id in product_ids:
+        product = products[product_id]
+        available = product['quantity_available'] - product['quantity_reserved']
+        if available < quantities[product_id]:
+            shortages.append({
                 "product_id": product_id,
                 "product_name": product['product_name'],
-                "current_quantity": current_quantity,
-                "requested_change": quantity_change,
-                "shortage": abs(new_quantity)
-            }), 400
+                "current_quantity": product['quantity_available'],
+                "reserved_quantity": product['quantity_reserved'],
+                "requested_quantity": quantities[product_id],
+                "shortage": quantities[product_id] - available
+            })
+    
+    if shortages:
+        return None, (jsonify({
+            "error": "Insufficient stock",
+            "shortages": shortages
+        }), 400)
+    return products, None
+
+def take_hot_lines(quantities):
+    """
+    Sells the batch lines of flash-sale products from their allocations, so
+    order traffic gets the same path as single decrements. All-or-nothing:
+    on failure every line already taken is undone.
+    Returns ({product_id: (allocator, product)}, None) or (None, error response).
+    Lines of products that are not in flash-sale mode are left out.
+    """
+    allocators = {product_id: hot_skus.get(product_id) for product_id in sorted(quantities)}
+    allocators = {product_id: allocator for product_id, allocator in allocators.items() if allocator}
+    if not allocators:
+        return {}, None
+    
+    held = {}
+    try:
+        products = load_products(list(allocators))
+        for product_id, allocator in allocators.items():
+            if product_id not in products:
+                continue
+            sold = allocator.take(quantities[product_id], hold=True)
+            if sold is None:
+                continue
+            if not sold:
+                settle_hot_lines(held, quantities, False)
+                return None, (jsonify({
+                    "error": "Insufficient stock",
+                    "shortages": [{
+                        "product_id": product_id,
+                        "product_name": products[product_id]['product_name'],
+                        "requested_quantity": quantities[product_id],
+                        "mode": "flash_sale"
+                    }]
+                }), 400)
+            held[product_id] = (allocator, products[product_id])
+    except Error as e:
+        settle_hot_lines(held, quantities, False)
+        return None, (jsonify({
+            "error": "Database update failed",
+            "details": str(e)
+        }), 500)
+    return held, None
+
+def settle_hot_lines(held, quantities, keep):
+    for product_id, (allocator, _) in held.items():
+        allocator.settle(quantities[product_id], keep)
+
+def apply_batch_change(quantities, direction):
+    """
+    Locks every product row, validates the whole batch and applies
+    direction * quantity to each one in a single transaction.
+    Nothing is written unless every line succeeds.
+    """
+    held = {}
+    if direction < 0:
+        held, error = take_hot_lines(quantities)
+        if error:
+            return error
+    
+    rows = {product_id: quantity for product_id, quantity in quantities.items() if product_id not in held}
+    products, error = write_batch_change(rows, direction) if rows else ({}, None)
+    settle_hot_lines(held, quantities, error is None)
+    if error:
+        return error
+    
+    items = [
+        {
+            "product_id": product_id,
+            "product_name": products[product_id]['product_name'],
+            "unit_price": float(products[product_id]['unit_price']),
+            "quantity_change": direction * quantities[product_id],
+            "new_quantity": products[product_id]['quantity_available'] + direction * quantities[product_id]
+        }
+        for product_id in sorted(rows)
+    ]
+    # Flash-sale lines are written by the next flush, so their new stock
+    # level is not known yet
+    items.extend(
+        {
+            "product_id": product_id,
+            "product_name": product['product_name'],
+            "unit_price": float(product['unit_price']),
+            "quantity_change": direction * quantities[product_id],
+            "mode": "flash_sale"
+        }
+        for product_id, (_, product) in held.items()
+    )
+    items.sort(key=lambda item: item['product_id'])
+    
+    return jsonify({
+        "message": "Inventory updated successfully",
+        "items": items
+    }), 200
+
+def write_batch_change(quantities, direction):
+    """
+    Returns ({product_id: row before the change}, None) or (None, error response).
+    """
+    connection = get_db_connection()
+    
+    if not connection:
+        return None, (jsonify({
+            "error": "Database connection failed"
+        }), 500)
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        
+        product_ids = sorted(quantities)
+        products, error = lock_products(cursor, quantities, direction < 0)
+        if error:
+            connection.rollback()
+            cursor.close()
+            return None, error
         
-        # Update the inventory
         update_query = """
             UPDATE inventory 
             SET quantity_available = quantity_available + %s,
                 last_updated = CURRENT_TIMESTAMP
             WHERE product_id = %s
         """
-        cursor.execute(update_query, (quantity_change, product_id))
+        cursor.executemany(update_query, [
+            (direction * quantities[product_id], product_id)
+            for product_id in product_ids
+        ])
         connection.commit()
-        
-        # Get updated product details
-        cursor.execute(check_query, (product_id,))
-        updated_product = cursor.fetchone()
-        
+        announce_changes()
+        for product_id in product_ids:
+            product_cache.pop(product_id)
         cursor.close()
-        connection.close()
         
-        return jsonify({
-            "message": "Inventory updated successfully",
-            "product_id": product_id,
-            "product_name": updated_product['product_name'],
-            "previous_quantity": current_quantity,
-            "quantity_change": quantity_change,
-            "new_quantity": updated_product['quantity_available']
-        }), 200
+        return products, None
         
     except Error as e:
-        if connection:
-            connection.rollback()
-        return jsonify({
+        connection.rollback()
+        return None, (jsonify({
             "error": "Database update failed",
             "details": str(e)
-        }), 500
+        }), 500)
     finally:
         if connection and connection.is_connected():
             connection.close()
 
+@app.route('/api/inventory/batch/reserve', methods=['POST'])
+def reserve_batch():
+    """
+    Reserve (decrement) stock for several products at once, all-or-nothing.
+    
+    URL: POST /api/inventory/batch/reserve
+    
+    Request Body (JSON):
+    {
+        "items": [
+            {"product_id": 1, "quantity": 2},
+            {"product_id": 3, "quantity": 1}
+        ]
+    }
+    
+    Lines for products in flash-sale mode are sold from the allocation and
+    carry "mode": "flash_sale" instead of new_quantity.
+    
+    Returns:
+        200: Every line reserved; items carry product_name and unit_price
+        400: Invalid input or insufficient stock for any line (nothing changed)
+        404: Any product not found (nothing changed)
+        500: Database error
+    """
+    quantities = parse_batch_items(request.get_json(silent=True))
+    if quantities is None:
+        return jsonify({
+            "error": "Invalid input",
+            "required": {"items": [{"product_id": "integer", "quantity": "positive integer"}]}
+        }), 400
+    
+    return apply_batch_change(quantities, -1)
+
+@app.route('/api/inventory/batch/restock', methods=['POST'])
+def restock_batch():
+    """
+    Return stock for several products at once (undo of a batch reserve).
+    
+    URL: POST /api/inventory/batch/restock
+    Request Body: same shape as /api/inventory/batch/reserve
+    """
+    quantities = parse_batch_items(request.get_json(silent=True))
+    if quantities is None:
+        return jsonify({
+            "error": "Invalid input",
+            "required": {"items": [{"product_id": "integer", "quantity": "positive integer"}]}
+        }), 400
+    
+    return apply_batch_change(quantities, 1)
+
 # ============================================
-# ERROR HANDLERS
+# ENDPOINT 4: CHECK INVENTORY FOR MANY PRODUCTS (GET / POST)
 # ============================================
-@app.errorhandler(404)
-def not_found(error):
-    """Handle 404 errors for undefined routes"""
-    return jsonify({
-        "error": "Endpoint not found",
-        "message": "The requested URL was not found on this server"
-    }), 404
+def parse_product_ids():
+    """
+    Reads ids from ?ids=1,2,3 or a {"product_ids": [1, 2, 3]} body.
+    Returns a de-duplicated list in request order, or None if invalid.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        raw_ids = data.get('product_ids') if isinstance(data, dict) else None
+        if not isinstance(raw_ids, list):
+            return None
+    else:
+        raw_ids = [part for part in request.args.get('ids', '').split(',') if part.strip()]
+    
+    try:
+        return list(dict.fromkeys(int(product_id) for product_id in raw_ids))
+    except (TypeError, ValueError):
+        return None
 
-@app.errorhandler(405)
-def method_not_allowed(error):
-    """Handle wrong HTTP method errors"""
-    return jsonify({
-        "error": "Method not allowed",
-        "message": "The method is not allowed for the requested URL"
-    }), 405
+def load_products(product_ids):
+    """
+    Returns {product_id: product} for the ids that exist. Cached rows are
+    reused; the rest are read with a single WHERE product_id IN (...) query.
+    Raises mysql.connector.Error on database failure.
+    """
+    products = {}
+    misses = []
+    for product_id in product_ids:
+        product = product_cache.get(product_id)
+        if product is None:
+            misses.append(product_id)
+        else:
+            products[product_id] = product
+    
+    if not misses:
+        return products
+    
+    connection = get_db_connection()
+    if not connection:
+        raise Error("Database connection failed")
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        placeholders = ", ".join(["%s"] * len(misses))
+        query = f"""
+            SELECT 
+                product_id,
+                product_name,
+                quantity_available,
+                quantity_reserved,
+                unit_price,
+                last_updated
+            FROM inventory 
+            WHERE product_id IN ({placeholders})
+        """
+        cursor.execute(query, tuple(misses))
+        for product in cursor.fetchall():
+            finish_product(product)
+            product_cache.set(product['product_id'], product)
+            products[product['product_id']] = product
+        cursor.close()
+    finally:
+        connection.close()
+    
+    return products
 
-@app.errorhandler(500)
-def internal_error(error):
-    """Handle internal server errors"""
+@app.route('/api/inventory/check', methods=['GET', 'POST'])
+def check_inventory_many():
+    """
+    Check stock and prices for several products in one call.
+    
+    URL: GET /api/inventory/check?ids=1,2,3
+     or: POST /api/inventory/check  with  {"product_ids": [1, 2, 3]}
+    
+    Returns:
+        200: {"products": {"1": {...}, "2": null, ...}, "missing_product_ids": [2]}
+             Unknown ids map to null and are also listed in missing_product_ids.
+        400: No ids, invalid ids, or more than MAX_CHECK_IDS ids
+        500: Database error
+    """
+    product_ids = parse_product_ids()
+    if not product_ids:
+        return jsonify({
+            "error": "Invalid input",
+            "message": "Provide integer ids as ?ids=1,2,3 or {\"product_ids\": [1, 2, 3]}"
+        }), 400
+    if len(product_ids) > MAX_CHECK_IDS:
+        return jsonify({
+            "error": "Too many product ids",
+            "max_ids": MAX_CHECK_IDS
+        }), 400
+    
+    try:
+        products = load_products(product_ids)
+    except Error as e:
+        return jsonify({
+            "error": "Database query failed",
+            "details": str(e)
+        }), 500
+    
     return jsonify({
-        "error": "Internal server error",
-        "message": "An unexpected error occurred"
-    }), 500
+        "products": {str(product_id): products.get(product_id) for product_id in product_ids},
+        "missing_product_ids": [product_id for product_id in product_ids if product_id not in products]
+    }), 200
 
 # ============================================
-# RUN THE APPLICATION
+# ENDPOINT 5: STOCK RESERVATIONS (RESERVE / COMMIT / RELEASE)
 # ============================================
-if __name__ == '__main__':
-    print("=" * 50)
-    print("🚀 Starting Inventory Service")
-    print("=" * 50)
-    print(f"Service running on: http://localhost:5002")
-    print(f"Health check: http://localhost:5002/health")
-    print(f"Endpoints:")
-    print(f"  GET  /api/inventory/check/<product_id>")
-    print(f"  PUT  /api/inventory/update")
-    print("=" * 50)
+# A reservation holds stock for a limited time without selling it: it adds
+# to inventory.quantity_reserved, which is subtracted from on-hand stock
+# wherever available-to-sell matters. Committing turns the hold into a sale,
+# releasing (or expiry by the sweeper) gives it back.
+@app.route('/api/inventory/reservations', methods=['POST'])
+def create_reservation():
+    """
+    Hold stock for several products, all-or-nothing, for a limited time.
+    
+    URL: POST /api/inventory/reservations
+    
+    Request Body (JSON):
+    {
+        "items": [{"product_id": 1, "quantity": 2}],
+        "ttl_seconds": 900  (optional, at most RESERVATION_MAX_TTL)
+    }
+    
+    Returns:
+        201: Reservation created (reservation_id, expires_at, items)
+        400: Invalid input or insufficient stock (nothing held)
+        404: Any product not found (nothing held)
+        500: Database error
+    """
+    data = request.get_json(silent=True)
+    quantities = parse_batch_items(data)
+    if quantities is None:
+        return jsonify({
+            "error": "Invalid input",
+            "required": {"items": [{"product_id": "integer", "quantity": "positive integer"}]}
+        }), 400
+    
+    try:
+        ttl_seconds = int(data.get('ttl_seconds', RESERVATION_DEFAULT_TTL))
+    except (TypeError, ValueError):
+        ttl_seconds = 0
+    if not 0 < ttl_seconds <= RESERVATION_MAX_TTL:
+        return jsonify({
+            "error": "Invalid ttl_seconds",
+            "message": f"ttl_seconds must be between 1 and {RESERVATION_MAX_TTL}"
+        }), 400
+    
+    connection = get_db_connection()
+    
+    if not connection:
+        return jsonify({
+            "error": "Database connection failed"
+        }), 500
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        
+        products, error = lock_products(cursor, quantities, True)
+        if error:
+            connection.rollback()
+            cursor.close()
+            return error
+        
+        expires_at = datetime.now().replace(microsecond=0) + timedelta(seconds=ttl_seconds)
+        cursor.execute("""
+            INSERT INTO stock_reservations (status, expires_at, created_at)
+            VALUES ('ACTIVE', %s, NOW())
+        """, (expires_at,))
+        reservation_id = cursor.lastrowid
+        
+        product_ids = sorted(quantities)
+        cursor.executemany("""
+            INSERT INTO stock_reservation_items (reservation_id, product_id, quantity)
+            VALUES (%s, %s, %s)
+        """, [(reservation_id, product_id, quantities[product_id]) for product_id in product_ids])
+        cursor.executemany("""
+            UPDATE inventory
+            SET quantity_reserved = quantity_reserved + %s
+            WHERE product_id = %s
+        """, [(quantities[product_id], product_id) for product_id in product_ids])
+        
+        connection.commit()
+        announce_changes()
+        for product_id in product_ids:
+            product_cache.pop(product_id)
+        cursor.close()
+        
+        return jsonify({
+            "message": "Stock reserved",
+            "reservation_id": reservation_id,
+            "status": "ACTIVE",
+            "expires_at": expires_at.isoformat(),
+            "items": [
+                {
+                    "product_id": product_id,
+                    "product_name": products[product_id]['product_name'],
+                    "unit_price": float(products[product_id]['unit_price']),
+                    "quantity": quantities[product_id]
+                }
+                for product_id in product_ids
+            ]
+        }), 201
+        
+    except Error as e:
+        connection.rollback()
+        return jsonify({
+            "error": "Database update failed",
+            "details": str(e)
+        }), 500
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+def finish_reservation(reservation_id, new_status):
+    """
+    Moves an ACTIVE reservation to COMMITTED (stock leaves on-hand) or
+    RELEASED (hold is dropped). Repeating the same transition is a no-op
+    success; an expired reservation cannot be committed.
+    """
+    connection = get_db_connection()
+    
+    if not connection:
+        return jsonify({
+            "error": "Database connection failed"
+        }), 500
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        
+        cursor.execute("""
+            SELECT reservation_id, status, expires_at
+            FROM stock_reservations
+            WHERE reservation_id = %s
+            FOR UPDATE
+        """, (reservation_id,))
+        reservation = cursor.fetchone()
+        
+        if not reservation:
+            connection.rollback()
+            cursor.close()
+            return jsonify({
+                "error": "Reservation not found",
+                "reservation_id": reservation_id
+            }), 404
+        
+        if reservation['status'] != 'ACTIVE':
+            connection.rollback()
+            cursor.close()
+            if reservation['status'] == new_status:
+                return jsonify({
+                    "message": f"Reservation already {new_status.lower()}",
+                    "reservation_id": reservation_id,
+                    "status": new_status
+                }), 200
+            return jsonify({
+                "error": f"Reservation is {reservation['status'].lower()}",
+                "reservation_id": reservation_id,
+                "status": reservation['status']
+            }), 409
+        
+        expired = reservation['expires_at'] <= datetime.now()
+        if expired:
+            # Expire it here rather than waiting for the sweeper
+            new_status = 'EXPIRED' if new_status == 'COMMITTED' else new_status
+        
+        cursor.execute("""
+            SELECT product_id, quantity
+            FROM stock_reservation_items
+            WHERE reservation_id = %s
+            ORDER BY product_id
+        """, (reservation_id,))
+        items = cursor.fetchall()
+        
+        if new_status == 'COMMITTED':
+            cursor.executemany("""
+                UPDATE inventory
+                SET quantity_available = quantity_available - %s,
+                    quantity_reserved = quantity_reserved - %s,
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE product_id = %s
+            """, [(item['quantity'], item['quantity'], item['product_id']) for item in items])
+        else:
+            cursor.executemany("""
+                UPDATE inventory
+                SET quantity_reserved = quantity_reserved - %s
+                WHERE product_id = %s
+            """, [(item['quantity'], item['product_id']) for item in items])
+        
+        cursor.execute("""
+            UPDATE stock_reservations SET status = %s WHERE reservation_id = %s
+        """, (new_status, reservation_id))
+        connection.commit()
+        announce_changes()
+        for item in items:
+            product_cache.pop(item['product_id'])
+        cursor.close()
+        
+        if new_status == 'EXPIRED':
+            return jsonify({
+                "error": "Reservation expired",
+                "reservation_id": reservation_id,
+                "status": "EXPIRED"
+            }), 410
+        
+        return jsonify({
+            "message": f"Reservation {new_status.lower()}",
+            "reservation_id": reservation_id,
+            "status": new_status,
+            "items": items
+        }), 200
+        
+    except Error as e:
+        connection.rollback()
+        return jsonify({
+            "error": "Database update failed",
+            "details": str(e)
+        }), 500
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+@app.route('/api/inventory/reservations/<int:reservation_id>/commit', methods=['POST'])
+def commit_reservation(reservation_id):
+    """
+    Turn a held reservation into a sale.
+    
+    URL: POST /api/inventory/reservations/{reservation_id}/commit
+    
+    Returns:
+        200: Committed (or already committed)
+        404: Reservation not found
+        409: Reservation was released or expired
+        410: Reservation expired just now; the hold was dropped
+        500: Database error
+    """
+    return finish_reservation(reservation_id, 'COMMITTED')
+
+@app.route('/api/inventory/reservations/<int:reservation_id>/release', methods=['POST'])
+def release_reservation(reservation_id):
+    """
+    Give held stock back without selling it.
+    
+    URL: POST /api/inventory/reservations/{reservation_id}/release
+    
+    Returns:
+        200: Released (or already released)
+        404: Reservation not found
+        409: Reservation was committed or expired
+        500: Database error
+    """
+    return finish_reservation(reservation_id, 'RELEASED')
+
+def expire_reservations(limit=None):
+    """
+    Expires up to `limit` overdue reservations in one transaction and
+    returns how many were expired. SKIP LOCKED lets several service
+    instances sweep at the same time without waiting on each other.
+    """
+    limit = limit or RESERVATION_SWEEP_BATCH
+    connection = get_db_connection()
+    if not connection:
+        return 0
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT reservation_id
+            FROM stock_reservations
+            WHERE status = 'ACTIVE' AND expires_at <= %s
+            ORDER BY expires_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (datetime.now(), limit))
+        reservation_ids = [row['reservation_id'] for row in cursor.fetchall()]
+        
+        if not reservation_ids:
+            connection.rollback()
+            cursor.close()
+            return 0
+        
+        placeholders = ", ".join(["%s"] * len(reservation_ids))
+        cursor.execute(f"""
+            SELECT product_id, SUM(quantity) AS quantity
+            FROM stock_reservation_items
+            WHERE reservation_id IN ({placeholders})
+            GROUP BY product_id
+            ORDER BY product_id
+        """, tuple(reservation_ids))
+        held = cursor.fetchall()
+        
+        cursor.executemany("""
+            UPDATE inventory
+            SET quantity_reserved = quantity_reserved - %s
+            WHERE product_id = %s
+        """, [(int(row['quantity']), row['product_id']) for row in held])
+        cursor.execute(f"""
+            UPDATE stock_reservations SET status = 'EXPIRED'
+            WHERE reservation_id IN ({placeholders})
+        """, tuple(reservation_ids))
+        connection.commit()
+        announce_changes()
+        for row in held:
+            product_cache.pop(row['product_id'])
+        cursor.close()
+        return len(reservation_ids)
+        
+    except Error as e:
+        connection.rollback()
+        print(f"Error expiring reservations: {e}")
+        return 0
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+def reservation_sweeper():
+    while True:
+        time.sleep(RESERVATION_SWEEP_INTERVAL)
+        # Keep going while full batches come back, so a backlog drains quickly
+        while expire_reservations() == RESERVATION_SWEEP_BATCH:
+            pass
+        while prune_changes() == RESERVATION_SWEEP_BATCH:
+            pass
+
+_sweeper = None
+_sweeper_lock = threading.Lock()
+
+def start_reservation_sweeper():
+    # Safe to call more than once: each process runs a single sweeper
+    global _sweeper
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = threading.Thread(target=reservation_sweeper, name="reservation-sweeper", daemon=True)
+            _sweeper.start()
+    return _sweeper
+
+@app.before_request
+def ensure_reservation_sweeper():
+    # Started on the first request rather than at import, so it also runs
+    # under a WSGI server (where __main__ never executes) and in every
+    # worker of a pre-forking one (threads do not survive fork)
+    if _sweeper is None:
+        start_reservation_sweeper()
+
+# ============================================
+# ENDPOINT 6: FLASH-SALE MODE FOR HOT SKUS
+# ============================================
+# During promotions thousands of decrements hit one inventory row and queue
+# on its row lock. A product switched to flash-sale mode gets a
+# HotSkuAllocator instead: it claims stock from MySQL in chunks (held in
+# quantity_reserved, so no other path or process can sell it), sells from
+# that in-memory allocation under a lock, and a background flusher writes
+# the units sold back in one coalesced UPDATE per product. Single decrements
+# and batch reserve lines (the order path) both sell from the allocation.
+# Timed reservations still go through the row, so they cannot use the
+# allocated units.
+#
+# If the process dies before a flush, the unflushed sales and the unsold
+# allocation both stay in quantity_reserved: nothing is oversold, but the
+# row needs reconciling by hand.
+class HotSkuAllocator:
+    def __init__(self, product_id, chunk_size):
+        self.product_id = product_id
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        self.allocation = 0  # claimed from MySQL, not yet sold
+        self.pending = 0     # sold here, not yet written to MySQL
+        self.active = True
+        # Batch reserves that took units and have not settled yet;
+        # disable_hot_sku waits for them on `settled`
+        self.open_batches = 0
+        self.settled = threading.Condition(self.lock)
+        # After a claim comes back empty, skip MySQL until this time so a
+        # sold-out SKU does not turn every rejection into a locking read
+        self.sold_out_until = 0.0
+        self.stats = {"sold": 0, "rejected": 0, "claims": 0, "flushes": 0}
+    
+    def take(self, quantity, hold=False):
+        """
+        Sell `quantity` units; returns False if stock has run out, or None
+        if flash-sale mode was switched off meanwhile. With hold, a
+        successful sale stays open until settle() is called.
+        """
+        with self.lock:
+            if not self.active:
+                return None
+            if self.allocation < quantity and time.monotonic() >= self.sold_out_until:
+                self._claim(max(self.chunk_size, quantity - self.allocation))
+            if self.allocation < quantity:
+                self.stats["rejected"] += 1
+                return False
+            self.allocation -= quantity
+            self.pending += quantity
+            self.stats["sold"] += quantity
+            if hold:
+                self.open_batches += 1
+            return True
+    
+    def settle(self, quantity, keep):
+        # Closes a take(hold=True). Without keep the sale is undone; if a
+        # flush already wrote it, pending goes negative and the next flush
+        # puts the units back.
+        with self.lock:
+            if not keep:
+                self.allocation += quantity
+                self.pending -= quantity
+                self.stats["sold"] -= quantity
+            self.open_batches -= 1
+            self.settled.notify_all()
+    
+    def _claim(self, wanted):
+        # Moves up to `wanted` available-to-sell units into this allocation.
+        # Called with self.lock held; one short transaction per chunk.
+        connection = get_db_connection()
+        if not connection:
+            raise Error("Database connection failed")
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("""
+                SELECT quantity_available - quantity_reserved AS available
+                FROM inventory
+                WHERE product_id = %s
+                FOR UPDATE
+            """, (self.product_id,))
+            row = cursor.fetchone()
+            claimed = min(wanted, row['available']) if row else 0
+            if claimed > 0:
+                cursor.execute("""
+                    UPDATE inventory
+                    SET quantity_reserved = quantity_reserved + %s
+                    WHERE product_id = %s
+                """, (claimed, self.product_id))
+            connection.commit()
+            cursor.close()
+        finally:
+            connection.close()
+        
+        if claimed > 0:
+            announce_changes()
+            self.allocation += claimed
+            self.stats["claims"] += 1
+            product_cache.pop(self.product_id)
+        else:
+            self.sold_out_until = time.monotonic() + FLASH_SALE_FLUSH_INTERVAL
+    
+    def drain(self):
+        # Hands over the units sold since the last flush
+        with self.lock:
+            pending, self.pending = self.pending, 0
+        return pending
+    
+    def restore(self, pending):
+        # A flush failed; keep the units for the next one
+        with self.lock:
+            self.pending += pending
+    
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats, product_id=self.product_id, chunk_size=self.chunk_size,
+                        active=self.active, allocation=self.allocation, pending=self.pending)
+
+hot_skus = {}
+_hot_skus_lock = threading.Lock()
+# One flush at a time, held from drain() until the write commits or its
+# units are restored, so disable_hot_sku can wait for an in-flight flush
+_flush_lock = threading.Lock()
+_flusher = None
+
+def flush_hot_skus(allocators=None):
+    """
+    Writes the units sold by every allocator to MySQL in one transaction:
+    on-hand and reserved stock both drop by the units sold.
+    Returns the number of units flushed.
+    """
+    with _flush_lock:
+        return _flush_allocators(list(hot_skus.values()) if allocators is None else allocators)
+
+def _flush_allocators(allocators):
+    # Called with _flush_lock held
+    drained = [(allocator, allocator.drain()) for allocator in allocators]
+    drained = [(allocator, pending) for allocator, pending in drained if pending]
+    if not drained:
+        return 0
+    
+    connection = get_db_connection()
+    try:
+        if not connection:
+            raise Error("Database connection failed")
+        cursor = connection.cursor()
+        cursor.executemany("""
+            UPDATE inventory
+            SET quantity_available = quantity_available - %s,
+                quantity_reserved = quantity_reserved - %s,
+                last_updated = CURRENT_TIMESTAMP
+            WHERE product_id = %s
+        """, [(pending, pending, allocator.product_id) for allocator, pending in sorted(drained, key=lambda d: d[0].product_id)])
+        connection.commit()
+        cursor.close()
+    except Error as e:
+        if connection:
+            connection.rollback()
+        for allocator, pending in drained:
+            allocator.restore(pending)
+        print(f"Error flushing flash-sale stock: {e}")
+        return 0
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+    
+    announce_changes()
+    for allocator, _ in drained:
+        allocator.stats["flushes"] += 1
+        product_cache.pop(allocator.product_id)
+    return sum(pending for _, pending in drained)
+
+def hot_sku_flusher():
+    while True:
+        time.sleep(FLASH_SALE_FLUSH_INTERVAL)
+        flush_hot_skus()
+
+def flash_sale_decrement(allocator, quantity):
+    # Returns None when the allocator was just disabled; the caller then
+    # takes the regular path
+    try:
+        sold = allocator.take(quantity)
+    except Error as e:
+        return jsonify({
+            "error": "Database update failed",
+            "details": str(e)
+        }), 500
+    
+    if sold is None:
+        return None
+    if not sold:
+        return jsonify({
+            "error": "Insufficient stock",
+            "product_id": allocator.product_id,
+            "requested_change": -quantity,
+            "mode": "flash_sale"
+        }), 400
+    
+    return jsonify({
+        "message": "Inventory updated successfully",
+        "product_id": allocator.product_id,
+        "quantity_change": -quantity,
+        "mode": "flash_sale"
+    }), 200
+
+def disable_hot_sku(product_id):
+    """
+    Flushes what was sold and hands the unsold allocation back. The
+    allocator stays registered (inactive, so new sales take the regular
+    path) until both writes succeed; on failure it raises Error and the
+    background flusher keeps retrying the sold units.
+    """
+    allocator = hot_skus.get(product_id)
+    if allocator is None:
+        return
+    
+    with allocator.lock:
+        allocator.active = False
+        while allocator.open_batches:
+            allocator.settled.wait()
+    
+    # Waits for an in-flight flush, then writes whatever it left behind
+    with _flush_lock:
+        _flush_allocators([allocator])
+        with allocator.lock:
+            if allocator.pending:
+                raise Error(f"{allocator.pending} sold units of product {product_id} are not flushed yet")
+            leftover, allocator.allocation = allocator.allocation, 0
+        
+        if leftover:
+            connection = get_db_connection()
+            try:
+                if not connection:
+                    raise Error("Database connection failed")
+                cursor = connection.cursor()
+                cursor.execute("""
+                    UPDATE inventory
+                    SET quantity_reserved = quantity_reserved - %s
+                    WHERE product_id = %s
+                """, (leftover, product_id))
+                connection.commit()
+                cursor.close()
+            except Error:
+                if connection:
+                    connection.rollback()
+                with allocator.lock:
+                    allocator.allocation += leftover
+                raise
+            finally:
+                if connection:
+                    connection.close()
+            announce_changes()
+            product_cache.pop(product_id)
+    
+    with _hot_skus_lock:
+        if hot_skus.get(product_id) is allocator and not allocator.active:
+            del hot_skus[product_id]
+
+@app.route('/api/inventory/flash-sale/<int:product_id>', methods=['PUT'])
+def set_flash_sale(product_id):
+    """
+    Switch flash-sale mode on or off for one product in this process.
+    
+    URL: PUT /api/inventory/flash-sale/{product_id}
+    
+    Request Body (JSON):
+    {
+        "enabled": true,
+        "chunk_size": 100  (optional, units claimed from MySQL at a time)
+    }
+    
+    Returns:
+        200: Mode updated
+        400: Invalid input
+        500: Database error while handing stock back
+    """
+    global _flusher
+    data = request.get_json(silent=True) or {}
+    enabled = data.get('enabled')
+    if not isinstance(enabled, bool):
+        return jsonify({
+            "error": "Invalid input",
+            "required": {"enabled": "boolean", "chunk_size": "positive integer (optional)"}
+        }), 400
+    
+    try:
+        chunk_size = int(data.get('chunk_size', FLASH_SALE_CHUNK_SIZE))
+    except (TypeError, ValueError):
+        chunk_size = 0
+    if chunk_size < 1:
+        return jsonify({
+            "error": "Invalid chunk_size",
+            "message": "chunk_size must be a positive integer"
+        }), 400
+    
+    if enabled:
+        with _hot_skus_lock:
+            allocator = hot_skus.get(product_id)
+            if allocator is None:
+                hot_skus[product_id] = HotSkuAllocator(product_id, chunk_size)
+            else:
+                # Also revives an allocator whose disable failed halfway
+                with allocator.lock:
+                    allocator.chunk_size = chunk_size
+                    allocator.active = True
+            if _flusher is None:
+                _flusher = threading.Thread(target=hot_sku_flusher, name="flash-sale-flusher", daemon=True)
+                _flusher.start()
+    else:
+        try:
+            disable_hot_sku(product_id)
+        except Error as e:
+            return jsonify({
+                "error": "Database update failed",
+                "details": str(e)
+            }), 500
+    
+    return jsonify({
+        "message": f"Flash-sale mode {'enabled' if enabled else 'disabled'}",
+        "product_id": product_id,
+        "enabled": enabled
+    }), 200
+
+@app.route('/api/inventory/flash-sale', methods=['GET'])
+def get_flash_sale():
+    """
+    List products in flash-sale mode with their allocation and counters.
+    
+    URL: GET /api/inventory/flash-sale
+    """
+    return jsonify({
+        "flush_interval_seconds": FLASH_SALE_FLUSH_INTERVAL,
+        "products": [allocator.snapshot() for allocator in list(hot_skus.values())]
+    }), 200
+
+# ============================================
+# ENDPOINT 7: INVENTORY CHANGE FEED
+# ============================================
+# Every write to an inventory row appends the row's new state to
+# inventory_changes inside the writing transaction, so consumers can keep a
+# replica current by reading the feed from their last change_id instead of
+# polling products one by one. The rows are written by the
+# inventory_after_update trigger (migration 009), which keeps a stock update
+# at a single statement; writers here only call announce_changes() once
+# they have committed.
+#
+# change_id is allocated when a row is inserted, not when its transaction
+# commits, so a lower id can become visible after a higher one. Reads stop
+# at such a gap until it is CHANGE_FEED_GAP_GRACE seconds old and then skip
+# it, treating it as an id a rolled-back transaction used. The feed cannot
+# tell the two apart: a write whose transaction commits more than
+# CHANGE_FEED_GAP_GRACE seconds after its UPDATE is never delivered to
+# consumers already past it. Writers in this service commit straight after
+# their UPDATE; the grace has to exceed the longest transaction that
+# updates inventory anywhere, and replicas that must not miss a change
+# should reload in full from time to time.
+
+# Wakes long-poll and SSE readers in this process as soon as a write here
+# commits; writes from other processes are picked up by polling.
+_change_signal = threading.Condition()
+_change_count = 0
+
+def announce_changes():
+    global _change_count
+    with _change_signal:
+        _change_count += 1
+        _change_signal.notify_all()
+
+def wait_for_changes(seen, timeout):
+    with _change_signal:
+        _change_signal.wait_for(lambda: _change_count != seen, timeout)
+
+# First time this process saw each open gap, keyed by the first missing id
+change_gaps = LRUCache(10000, ttl=max(60.0, CHANGE_FEED_GAP_GRACE * 10))
+
+def gap_expired(change_id):
+    first_seen = change_gaps.get(change_id)
+    if first_seen is None:
+        change_gaps.set(change_id, time.monotonic())
+        return False
+    return time.monotonic() - first_seen >= CHANGE_FEED_GAP_GRACE
+
+def fetch_changes(since, limit):
+    """
+    Returns (changes, next_since, has_more, at_gap) for up to `limit`
+    changes after `since`. at_gap is True when the read stopped at a gap that
+    is still within its grace period, i.e. newer changes exist but cannot be
+    delivered yet. Raises Error if the database is unavailable.
+    """
+    connection = get_db_connection()
+    if not connection:
+        raise Error("Database connection failed")
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT change_id, product_id, change_type, product_name,
+                   quantity_available, quantity_reserved, unit_price, changed_at
+            FROM inventory_changes
+            WHERE change_id > %s
+            ORDER BY change_id
+            LIMIT %s
+        """, (since, limit))
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        connection.close()
+    
+    changes = []
+    at_gap = False
+    # A fresh consumer (since=0) starts wherever the retained feed begins
+    expected = since + 1 if since else None
+    for row in rows:
+        if expected is not None and row['change_id'] != expected and not gap_expired(expected):
+            at_gap = True
+            break
+        row = finish_product(row)
+        row['changed_at'] = row['changed_at'].isoformat()
+        changes.append(row)
+        expected = row['change_id'] + 1
+    
+    next_since = changes[-1]['change_id'] if changes else since
+    return changes, next_since, len(changes) == limit, at_gap
+
+def latest_change_id():
+    connection = get_db_connection()
+    if not connection:
+        raise Error("Database connection failed")
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT MAX(change_id) FROM inventory_changes")
+        row = cursor.fetchone()
+        cursor.close()
+    finally:
+        connection.close()
+    return row[0] or 0
+
+def prune_changes(limit=None):
+    """
+    Deletes up to `limit` changes older than CHANGE_FEED_RETENTION_HOURS and
+    returns how many were deleted. Consumers further behind than that have
+    to reload in full.
+    """
+    limit = limit or RESERVATION_SWEEP_BATCH
+    connection = get_db_connection()
+    if not connection:
+        return 0
+    
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            DELETE FROM inventory_changes
+            WHERE changed_at < %s
+            ORDER BY changed_at
+            LIMIT %s
+        """, (datetime.now() - timedelta(hours=CHANGE_FEED_RETENTION_HOURS), limit))
+        deleted = cursor.rowcount
+        connection.commit()
+        cursor.close()
+        return deleted
+    except Error as e:
+        connection.rollback()
+        print(f"Error pruning inventory changes: {e}")
+        return 0
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+
+def stream_changes(since, limit):
+    # Server-Sent Events: one `change` event per row with its change_id as
+    # the event id, so a reconnecting EventSource resumes via Last-Event-ID.
+    def generate():
+        position = since
+        last_sent = time.monotonic()
+        yield f"retry: {int(CHANGE_FEED_POLL_INTERVAL * 1000)}\n\n"
+        while True:
+            seen = _change_count
+            try:
+                changes, position, has_more, at_gap = fetch_changes(position, limit)
+            except Error as e:
+                # Headers are already sent; report the failure as the last event
+                yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                return
+            for change in changes:
+                yield f"id: {change['change_id']}\nevent: change\ndata: {json.dumps(change)}\n\n"
+            if has_more:
+                continue
+            if changes:
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= CHANGE_FEED_HEARTBEAT:
+                yield ": keep-alive\n\n"
+                last_sent = time.monotonic()
+            wait_for_changes(seen, CHANGE_FEED_POLL_INTERVAL)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/api/inventory/changes', methods=['GET'])
+def get_changes():
+    """
+    Read inventory changes after a sequence number.
+    
+    URL: GET /api/inventory/changes?since=0&limit=500&wait=20
+    
+    Query Parameters:
+        since: last change_id already applied (default 0 = from the start);
+               for SSE the Last-Event-ID header takes precedence.
+               since=latest returns no changes, only the current head as
+               next_since, for consumers that bootstrap from an export
+        limit: changes per response (default CHANGE_FEED_PAGE_SIZE)
+        wait: seconds to hold the request open while there is nothing new
+              (long poll, at most CHANGE_FEED_MAX_WAIT)
+    
+    With "Accept: text/event-stream" (or format=sse) the response is an
+    open Server-Sent Events stream instead.
+    
+    Each change carries the product's full state after the write
+    (quantity_available, quantity_reserved, available_to_sell, unit_price,
+    product_name), so applying changes in order is enough to stay current,
+    except for a write that commits more than CHANGE_FEED_GAP_GRACE seconds
+    after its UPDATE, which can be skipped (see the note above fetch_changes).
+    
+    Returns:
+        200: {"changes": [...], "next_since": 42, "has_more": false, "at_gap": false}
+             at_gap: the read stopped at a change that is not visible yet
+             (its transaction is still committing), so the consumer is
+             behind even though has_more is false
+        400: Invalid parameters
+        500: Database error
+    """
+    sse = (request.args.get('format') == 'sse'
+           or request.accept_mimetypes.best == 'text/event-stream')
+    if request.args.get('since') == 'latest' and not sse:
+        try:
+            head = latest_change_id()
+        except Error as e:
+            return jsonify({
+                "error": "Database query failed",
+                "details": str(e)
+            }), 500
+        return jsonify({"changes": [], "next_since": head, "has_more": False, "at_gap": False}), 200
+    
+    try:
+        since = int(request.headers.get('Last-Event-ID') if sse and request.headers.get('Last-Event-ID')
+                    else request.args.get('since', 0))
+        limit = int(request.args.get('limit', CHANGE_FEED_PAGE_SIZE))
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        since = limit = wait = -1
+    if since < 0 or not 0 < limit <= CHANGE_FEED_MAX_PAGE_SIZE or not 0 <= wait <= CHANGE_FEED_MAX_WAIT:
+        return jsonify({
+            "error": "Invalid parameters",
+            "message": (f"since must be a non-negative integer, limit between 1 and "
+                        f"{CHANGE_FEED_MAX_PAGE_SIZE}, wait between 0 and {CHANGE_FEED_MAX_WAIT}")
+        }), 400
+    
+    if sse:
+        return stream_changes(since, limit)
+    
+    deadline = time.monotonic() + wait
+    try:
+        while True:
+            seen = _change_count
+            changes, next_since, has_more, at_gap = fetch_changes(since, limit)
+            remaining = deadline - time.monotonic()
+            if changes or remaining <= 0:
+                break
+            wait_for_changes(seen, min(remaining, CHANGE_FEED_POLL_INTERVAL))
+    except Error as e:
+        return jsonify({
+            "error": "Database query failed",
+            "details": str(e)
+        }), 500
+    
+    return jsonify({
+        "changes": changes,
+        "next_since": next_since,
+        "has_more": has_more,
+        "at_gap": at_gap
+    }), 200
+
+# ============================================
+# ENDPOINT 8: PRODUCT LISTING AND SEARCH (GET)
+# ============================================
+# Keyset pagination over (sort column, product_id), backed by the indexes
+# in backend/database/migrations/006_inventory_listing_indexes.sql. Filters
+# are ANDed; MySQL drives the scan from one index and checks the rest
+# row by row.
+PRODUCT_SORTS = {'id': None, 'name': 'product_name', 'price': 'unit_price'}
+
+def encode_product_cursor(sort, product):
+    # Opaque keyset cursor: sort order plus position of the last product
+    value = product[PRODUCT_SORTS[sort]] if PRODUCT_SORTS[sort] else None
+    raw = json.dumps([sort, str(value) if sort == 'price' else value, product['product_id']])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_product_cursor(token, sort):
+    if not token:
+        return None
+    try:
+        cursor_sort, value, product_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        if sort == 'price':
+            value = Decimal(value)
+        product_id = int(product_id)
+    except (ValueError, TypeError, ArithmeticError):
+        # Cursors are opaque; a tampered one is a bad request, not a crash
+        raise ValueError("invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("cursor belongs to a different sort order")
+    if sort == 'price' and not value.is_finite():
+        raise ValueError("invalid cursor")
+    return value, product_id
+
+def parse_flag(value):
+    value = value.lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"invalid boolean '{value}'")
+
+def build_products_query(args, sort, after, limit):
+    """
+    Builds the listing query from the request's filters.
+    Raises ValueError for malformed parameters.
+    """
+    conditions = []
+    params = []
+    
+    prefix = args.get('q')
+    if prefix:
+        # '!' escapes LIKE wildcards typed by the user
+        escaped = prefix.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+        conditions.append("product_name LIKE %s ESCAPE '!'")
+        params.append(escaped + '%')
+    
+    if args.get('in_stock'):
+        conditions.append("available_to_sell > 0" if parse_flag(args['in_stock']) else "available_to_sell <= 0")
+    
+    low_stock = args.get('low_stock')
+    if low_stock:
+        # A number is the threshold; otherwise a flag on LOW_STOCK_THRESHOLD
+        try:
+            threshold, low = int(low_stock), True
+        except ValueError:
+            threshold, low = LOW_STOCK_THRESHOLD, parse_flag(low_stock)
+        conditions.append("available_to_sell <= %s" if low else "available_to_sell > %s")
+        params.append(threshold)
+    
+    for name, operator in (('min_price', '>='), ('max_price', '<=')):
+        if args.get(name):
+            try:
+                price = Decimal(args[name])
+            except ArithmeticError:
+                price = None
+            if price is None or not price.is_finite():
+                raise ValueError(f"{name} must be a number")
+            conditions.append(f"unit_price {operator} %s")
+            params.append(price)
+    
+    column = PRODUCT_SORTS[sort]
+    if after:
+        if column:
+            conditions.append(f"({column} > %s OR ({column} = %s AND product_id > %s))")
+            params.extend([after[0], after[0], after[1]])
+        else:
+            conditions.append("product_id > %s")
+            params.append(after[1])
+    
+    query = """
+        SELECT product_id, product_name, quantity_available, quantity_reserved,
+               unit_price, last_updated
+        FROM inventory
+    """
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {column}, product_id" if column else " ORDER BY product_id"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return query, tuple(params)
+
+def serialize_listed_product(product):
+    product = finish_product(product)
+    product['last_updated'] = product['last_updated'].isoformat() if product['last_updated'] else None
+    return product
+
+EXPORT_COLUMNS = ['product_id', 'product_name', 'quantity_available', 'quantity_reserved',
+                  'available_to_sell', 'unit_price', 'last_updated']
+
+def stream_products(query, params, fmt='ndjson'):
+    # Rows come from an unbuffered (server-side) cursor in chunks, so a full
+    # catalog export is never held in memory
+    def generate():
+        connection = get_db_connection()
+        if not connection:
+            yield json.dumps({"error": "Database connection failed"}) + "\n"
+            return
+        cursor = None
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, EXPORT_COLUMNS, extrasaction='ignore', lineterminator='\n')
+        if fmt == 'csv':
+            writer.writeheader()
+        try:
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            cursor.execute(query, params)
+            while True:
+                products = cursor.fetchmany(PRODUCT_STREAM_CHUNK_SIZE)
+                if not products:
+                    break
+                if fmt == 'csv':
+                    writer.writerows(serialize_listed_product(product) for product in products)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    for product in products:
+                        yield json.dumps(serialize_listed_product(product)) + "\n"
+        except Error as e:
+            # Headers are already sent; report the failure as the last line
+            yield json.dumps({"error": "Database query failed", "details": str(e)}) + "\n"
+        finally:
+            # Return the connection even if closing the cursor fails
+            try:
+                if cursor:
+                    cursor.close()
+            finally:
+                connection.close()
+    
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+@app.route('/api/inventory/products', methods=['GET'])
+def list_products():
+    """
+    List and search the catalog.
+    
+    URL: GET /api/inventory/products?q=lap&in_stock=true&limit=50
+    
+    Query Parameters:
+        q: product name prefix (sorts by name unless sort is given)
+        in_stock: true / false, on available-to-sell stock
+        low_stock: true (at most LOW_STOCK_THRESHOLD available), false (more
+                   than that) or a number to use as the threshold
+        min_price, max_price: inclusive unit_price bounds
+        sort: id (default), name or price
+        limit: page size (default PRODUCT_PAGE_SIZE, at most PRODUCT_MAX_PAGE_SIZE)
+        after: next_cursor from the previous page
+        format: "ndjson" streams every matching product, one per line
+    
+    Returns:
+        200: {"total_products": 50, "products": [...], "next_cursor": "..."}
+        400: Invalid parameters
+        500: Database error
+    """
+    stream = request.args.get('format') == 'ndjson'
+    sort = request.args.get('sort') or ('name' if request.args.get('q') else 'id')
+    if sort not in PRODUCT_SORTS:
+        return jsonify({
+            "error": "Invalid sort",
+            "allowed": sorted(PRODUCT_SORTS)
+        }), 400
+    
+    try:
+        after = decode_product_cursor(request.args.get('after'), sort)
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be positive")
+        if not stream:
+            limit = min(limit or PRODUCT_PAGE_SIZE, PRODUCT_MAX_PAGE_SIZE)
+        query, params = build_products_query(request.args, sort, after, limit)
+    except (ValueError, TypeError) as e:
+        return jsonify({
+            "error": "Invalid parameters",
+            "details": str(e)
+        }), 400
+    
+    if stream:
+        return stream_products(query, params)
+    
+    connection = get_db_connection()
+    
+    if not connection:
+        return jsonify({
+            "error": "Database connection failed"
+        }), 500
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(query, params)
+        products = [serialize_listed_product(product) for product in cursor.fetchall()]
+        cursor.close()
+    except Error as e:
+        return jsonify({
+            "error": "Database query failed",
+            "details": str(e)
+        }), 500
+    finally:
+        connection.close()
+    
+    # A full page means there may be more rows after the last one
+    next_cursor = encode_product_cursor(sort, products[-1]) if len(products) == limit else None
+    return jsonify({
+        "total_products": len(products),
+        "products": products,
+        "next_cursor": next_cursor
+    }), 200
+
+# ============================================
+# ENDPOINT 9: BULK STOCK IMPORT / EXPORT
+# ============================================
+# Warehouse resyncs send one streamed file instead of thousands of
+# PUT /api/inventory/update calls. The body is read row by row and applied
+# in transactions of IMPORT_CHUNK_SIZE rows (lock, validate, one
+# executemany), so memory stays flat however large the file is. A chunk
+# that hits a database error is rolled back on its own; earlier chunks stay
+# applied and every failed row is listed in the report.
+IMPORT_COLUMNS = ['product_id', 'quantity_change', 'absolute_quantity', 'unit_price']
+
+def import_field(record, name):
+    value = record.get(name)
+    return None if value is None or value == '' else value
+
+def import_int(value, name):
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer")
+
+def parse_import_row(record):
+    """
+    Validates one import record and returns
+    (product_id, quantity_change, absolute_quantity, unit_price);
+    raises ValueError describing the first problem.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("row must be an object")
+    if import_field(record, 'product_id') is None:
+        raise ValueError("product_id is required")
+    product_id = import_int(record['product_id'], 'product_id')
+    
+    change = import_field(record, 'quantity_change')
+    absolute = import_field(record, 'absolute_quantity')
+    price = import_field(record, 'unit_price')
+    if change is not None and absolute is not None:
+        raise ValueError("give quantity_change or absolute_quantity, not both")
+    if change is None and absolute is None and price is None:
+        raise ValueError("nothing to update: give quantity_change, absolute_quantity or unit_price")
+    
+    if change is not None:
+        change = import_int(change, 'quantity_change')
+    if absolute is not None:
+        absolute = import_int(absolute, 'absolute_quantity')
+        if absolute < 0:
+            raise ValueError("absolute_quantity must not be negative")
+    if price is not None:
+        try:
+            price = Decimal(str(price))
+        except ArithmeticError:
+            price = None
+        if price is None or not price.is_finite() or price < 0:
+            raise ValueError("unit_price must be a non-negative number")
+    return product_id, change, absolute, price
+
+def read_import_records(stream, fmt):
+    # Yields (line_number, record, parse_error) without reading ahead
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line), None
+        except ValueError:
+            yield line_number, None, "invalid JSON"
+
+def import_error(line, product_id, error):
+    return {"line": line, "product_id": product_id, "error": error}
+
+def apply_import_chunk(rows):
+    """
+    Applies [(line, product_id, change, absolute, price), ...] in one
+    transaction, in file order. Rows for missing products or that would
+    leave available-to-sell stock negative are skipped and reported.
+    Returns (applied, errors).
+    """
+    connection = get_db_connection()
+    if not connection:
+        return 0, [import_error(row[0], row[1], "Database connection failed") for row in rows]
+    
+    try:
+        cursor = connection.cursor(dictionary=True)
+        product_ids = sorted({row[1] for row in rows})
+        placeholders = ", ".join(["%s"] * len(product_ids))
+        cursor.execute(f"""
+            SELECT product_id, quantity_available, quantity_reserved
+            FROM inventory
+            WHERE product_id IN ({placeholders})
+            ORDER BY product_id
+            FOR UPDATE
+        """, tuple(product_ids))
+        locked = cursor.fetchall()
+        on_hand = {row['product_id']: row['quantity_available'] for row in locked}
+        reserved = {row['product_id']: row['quantity_reserved'] for row in locked}
+        
+        updates = []
+        errors = []
+        updated_ids = set()
+        for line, product_id, change, absolute, price in rows:
+            if product_id not in on_hand:
+                errors.append(import_error(line, product_id, "Product not found"))
+                continue
+            quantity = absolute if absolute is not None else on_hand[product_id] + (change or 0)
+            # Same rule as update_inventory: a decrease may not take
+            # available-to-sell stock below zero
+            if quantity < on_hand[product_id] and quantity < reserved[product_id]:
+                errors.append(import_error(line, product_id,
+                                           f"Insufficient stock: {on_hand[product_id] - reserved[product_id]} available"))
+                continue
+            on_hand[product_id] = quantity
+            updates.append((absolute, change or 0, price, product_id))
+            updated_ids.add(product_id)
+        
+        if updates:
+            # Absolute rows set the quantity, change rows add to it; a null
+            # unit_price leaves the price alone
+            cursor.executemany("""
+                UPDATE inventory
+                SET quantity_available = COALESCE(%s, quantity_available + %s),
+                    unit_price = COALESCE(%s, unit_price),
+                    last_updated = CURRENT_TIMESTAMP
+                WHERE product_id = %s
+            """, updates)
+        connection.commit()
+        cursor.close()
+    except Error as e:
+        connection.rollback()
+        return 0, [import_error(row[0], row[1], f"Database update failed: {e}") for row in rows]
+    finally:
+        if connection and connection.is_connected():
+            connection.close()
+    
+    if updates:
+        announce_changes()
+        for product_id in updated_ids:
+            product_cache.pop(product_id)
+    return len(updates), errors
+
+@app.route('/api/inventory/import', methods=['POST'])
+def import_inventory():
+    """
+    Apply a streamed stock file.
+    
+    URL: POST /api/inventory/import
+    
+    Request Body: CSV (Content-Type: text/csv, header row required) or
+    NDJSON (application/x-ndjson), one row per product update:
+        product_id,quantity_change,absolute_quantity,unit_price
+        1,-5,,
+        2,,40,19.99
+    Each row needs product_id plus quantity_change or absolute_quantity
+    (not both) and/or unit_price. ?format=csv|ndjson overrides the
+    Content-Type.
+    
+    Returns:
+        200: {"rows": 2, "applied": 2, "failed": 0, "errors": []}
+             errors lists every rejected row with its line number
+        400: Missing product_id column in a CSV header
+        415: Unsupported format
+    """
+    fmt = request.args.get('format') or IMPORT_FORMATS.get(request.mimetype)
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({
+            "error": "Unsupported format",
+            "supported": sorted(IMPORT_FORMATS)
+        }), 415
+    
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8', errors='replace', newline='')
+    if fmt == 'csv':
+        header = stream.readline()
+        if 'product_id' not in next(csv.reader([header]), []):
+            return jsonify({
+                "error": "Invalid CSV header",
+                "required": ["product_id"],
+                "optional": IMPORT_COLUMNS[1:]
+            }), 400
+        stream = itertools.chain([header], stream)
+    
+    report = {"rows": 0, "applied": 0, "failed": 0, "errors": []}
+    chunk = []
+    
+    def flush():
+        applied, errors = apply_import_chunk(chunk)
+        report["applied"] += applied
+        report["errors"].extend(errors)
+        chunk.clear()
+    
+    for line, record, error in read_import_records(stream, fmt):
+        report["rows"] += 1
+        try:
+            if error:
+                raise ValueError(error)
+            chunk.append((line, *parse_import_row(record)))
+        except ValueError as e:
+            product_id = record.get('product_id') if isinstance(record, dict) else None
+            report["errors"].append(import_error(line, product_id, str(e)))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            flush()
+    if chunk:
+        flush()
+    
+    report["errors"].sort(key=lambda error: error["line"])
+    report["failed"] = len(report["errors"])
+    return jsonify(report), 200
+
+@app.route('/api/inventory/export', methods=['GET'])
+def export_inventory():
+    """
+    Stream the whole inventory table in product_id order.
+    
+    URL: GET /api/inventory/export?format=csv  (or ndjson)
+    
+    Rows are read from an unbuffered cursor and written out chunk by chunk,
+    so the table is never held in memory.
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({
+            "error": "Unsupported format",
+            "supported": ["csv", "ndjson"]
+        }), 400
+    
+    query, params = build_products_query({}, 'id', None, None)
+    response = stream_products(query, params, fmt)
+    response.headers['Content-Disposition'] = f'attachment; filename="inventory.{fmt}"'
+    return response
+
+# ============================================
+# ERROR HANDLERS
+# ============================================
+@app.errorhandler(404)
+def not_found(error):
+    """Handle 404 errors for undefined routes"""
+    return jsonify({
+        "error": "Endpoint not found",
+        "message": "The requested URL was not found on this server"
+    }), 404
+
+@app.errorhandler(405)
+def method_not_allowed(error):
+    """Handle wrong HTTP method errors"""
+    return jsonify({
+        "error": "Method not allowed",
+        "message": "The method is not allowed for the requested URL"
+    }), 405
+
+@app.errorhandler(500)
+def internal_error(error):
+    """Handle internal server errors"""
+    return jsonify({
+        "error": "Internal server error",
+        "message": "An unexpected error occurred"
+    }), 500
+
+# ============================================
+# RUN THE APPLICATION
+# ============================================
+if __name__ == '__main__':
+    print("=" * 50)
+    print("🚀 Starting Inventory Service")
+    print("=" * 50)
+    print(f"Service running on: http://localhost:5002")
+    print(f"Health check: http://localhost:5002/health")
+    print(f"Endpoints:")
+    print(f"  GET  /api/inventory/check/<product_id>")
+    print(f"  GET  /api/inventory/check?ids=1,2,3  (or POST)")
+    print(f"  GET  /api/inventory/products?q=&in_stock=&low_stock=&min_price=&max_price=")
+    print(f"  PUT  /api/inventory/update")
+    print(f"  POST /api/inventory/batch/reserve")
+    print(f"  POST /api/inventory/batch/restock")
+    print(f"  POST /api/inventory/import  (CSV or NDJSON body)")
+    print(f"  GET  /api/inventory/export?format=csv|ndjson")
+    print(f"  POST /api/inventory/reservations")
+    print(f"  POST /api/inventory/reservations/<reservation_id>/commit")
+    print(f"  POST /api/inventory/reservations/<reservation_id>/release")
+    print(f"  PUT  /api/inventory/flash-sale/<product_id>")
+    print(f"  GET  /api/inventory/flash-sale")
+    print(f"  GET  /api/inventory/changes?since=<change_id>  (long poll or SSE)")
+    print("=" * 50)
+    
+    # Expire abandoned reservations in the background
+    start_reservation_sweeper()
     
     # Run Flask app on port 5002
     app.run(
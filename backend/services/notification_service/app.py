@@ -1,6 +1,12 @@
 from flask import Flask, jsonify, request
 import mysql.connector
-import requests
+import os
+import sys
+
+# backend/services holds the helpers shared by every service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.db import ConnectionPool
+from shared.http_client import get_client
 
 app = Flask(__name__)
 
@@ -12,12 +18,16 @@ db_config = {
 }
 
 
-CUSTOMER_SERVICE_URL = "http://localhost:5004/api/customers"
-INVENTORY_SERVICE_URL = "http://localhost:5002/api/inventory/check"
+CUSTOMER_SERVICE_URL = os.environ.get('CUSTOMER_SERVICE_URL', "http://localhost:5004") + "/api/customers"
+INVENTORY_SERVICE_URL = os.environ.get('INVENTORY_SERVICE_URL', "http://localhost:5002") + "/api/inventory/check"
+customer_client = get_client(CUSTOMER_SERVICE_URL)
+inventory_client = get_client(INVENTORY_SERVICE_URL)
+
+db_pool = ConnectionPool(db_config, pool_name='notification_service')
 
 def get_db_connection():
     try:
-        return mysql.connector.connect(**db_config)
+        return db_pool.get_connection()
     except mysql.connector.Error as err:
         print(f"❌ DB Connection Error: {err}")
         return None
@@ -53,15 +63,17 @@ def send_notification():
     product_id_sample = 1 # افتراضي للتحقق من المخزون
 
     if conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-                       SELECT o.customer_id, oi.product_id
-                       FROM orders o
-                                LEFT JOIN order_items oi ON o.order_id = oi.order_id
-                       WHERE o.order_id = %s LIMIT 1
-                       """, (order_id,))
-        result = cursor.fetchone()
-        conn.close()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute("""
+                           SELECT o.customer_id, oi.product_id
+                           FROM orders o
+                                    LEFT JOIN order_items oi ON o.order_id = oi.order_id
+                           WHERE o.order_id = %s LIMIT 1
+                           """, (order_id,))
+            result = cursor.fetchone()
+        finally:
+            conn.close()
 
         if result:
             customer_id = result['customer_id']
@@ -70,7 +82,7 @@ def send_notification():
             return jsonify({"error": "Order not found"}), 404
     try:
         print(f"📞 Calling Customer Service API for ID: {customer_id}...")
-        cust_response = requests.get(f"{CUSTOMER_SERVICE_URL}/{customer_id}")
+        cust_response = customer_client.get(f"{CUSTOMER_SERVICE_URL}/{customer_id}")
 
         if cust_response.status_code == 200:
             cust_data = cust_response.json()
@@ -85,7 +97,7 @@ def send_notification():
         return jsonify({"error": f"Customer Service Unreachable: {str(e)}"}), 503
     try:
         print(f"📦 Calling Inventory Service API for Product: {product_id_sample}...")
-        inv_response = requests.get(f"{INVENTORY_SERVICE_URL}/{product_id_sample}")
+        inv_response = inventory_client.get(f"{INVENTORY_SERVICE_URL}/{product_id_sample}")
 
         if inv_response.status_code == 200:
             print("   ✅ Inventory Check: OK")
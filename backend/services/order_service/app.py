@@ -1,6 +1,22 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 import mysql.connector
 import requests
+import base64
+import json
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+import os
+import sys
+
+# backend/services holds the helpers shared by every service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.cache import LRUCache
+from shared.db import ConnectionPool
+from shared.http_client import get_client
 
 app = Flask(__name__)
 
@@ -12,80 +28,193 @@ db_config = {
     'database': 'ecommerce_system'
 }
 
+INVENTORY_SERVICE_URL = os.environ.get('INVENTORY_SERVICE_URL', "http://localhost:5002")
+inventory_client = get_client(INVENTORY_SERVICE_URL)
+
+# Stock reservation for create_order: one batch call per order, or per-line
+# calls with bounded concurrency when the batch endpoint is off / unavailable
+USE_BATCH_RESERVE = os.environ.get('ORDER_BATCH_RESERVE', '1') != '0'
+ORDER_LINE_CONCURRENCY = int(os.environ.get('ORDER_LINE_CONCURRENCY', 8))
+
+# POST /api/orders/batch
+ORDER_BATCH_MAX_ORDERS = int(os.environ.get('ORDER_BATCH_MAX_ORDERS', 1000))
+ORDER_BATCH_CHUNK_SIZE = int(os.environ.get('ORDER_BATCH_CHUNK_SIZE', 50))
+
+# GET /api/orders/stats
+STATS_DEFAULT_DAYS = 30
+STATS_DEFAULT_TOP = 10
+STATS_MAX_TOP = 100
+
+# Read-through cache of serialized GET /api/orders/<id> responses
+ORDER_CACHE_SIZE = int(os.environ.get('ORDER_CACHE_SIZE', 5000))
+ORDER_CACHE_TTL = float(os.environ.get('ORDER_CACHE_TTL', 300))
+order_cache = LRUCache(ORDER_CACHE_SIZE, ttl=ORDER_CACHE_TTL)
+
+# Idempotency-Key support for POST /api/orders/create: the durable record is
+# the idempotency_keys table, completed responses are also kept in an LRU
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', 10000))
+IDEMPOTENCY_WAIT_SECONDS = float(os.environ.get('IDEMPOTENCY_WAIT_SECONDS', 10))
+IDEMPOTENCY_STALE_SECONDS = int(os.environ.get('IDEMPOTENCY_STALE_SECONDS', 60))
+IDEMPOTENCY_POLL_SECONDS = 0.1
+idempotency_cache = LRUCache(IDEMPOTENCY_CACHE_SIZE)
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+# Max number of order ids bound into a single IN (...) list
+ITEMS_BATCH_SIZE = 1000
+
+# Pagination / streaming for GET /api/orders
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+
+db_pool = ConnectionPool(db_config, pool_name='order_service')
+
 def get_db_connection():
-    return mysql.connector.connect(**db_config)
+    return db_pool.get_connection()
+
+def serialize_order(order, items):
+    return {
+        "order_id": order['order_id'],
+        "customer_id": order['customer_id'],
+        "total_amount": float(order['total_amount']),
+        "status": order['status'],
+        "created_at": order['created_at'].isoformat() if order['created_at'] else None,
+        "items": [
+            {
+                "product_id": item['product_id'],
+                "quantity": item['quantity'],
+                "unit_price": float(item['unit_price_at_purchase'])
+            }
+            for item in items
+        ]
+    }
+
+def encode_cursor(order):
+    # Opaque keyset cursor: position of the last order on the page
+    created_at = order['created_at'].isoformat() if order['created_at'] else None
+    raw = json.dumps([created_at, order['order_id']])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(token):
+    if not token:
+        return None
+    created_at, order_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+    return datetime.fromisoformat(created_at), int(order_id)
+
+def build_orders_query(customer_id, after, limit):
+    # Newest first, order_id breaks ties so the keyset position is unique.
+    # Backed by the (created_at, order_id) and (customer_id, created_at, order_id)
+    # indexes in backend/database/migrations/001_orders_keyset_indexes.sql
+    conditions = []
+    params = []
+    if customer_id:
+        conditions.append("customer_id = %s")
+        params.append(customer_id)
+    if after:
+        conditions.append("(created_at < %s OR (created_at = %s AND order_id < %s))")
+        params.extend([after[0], after[0], after[1]])
+
+    query_orders = """
+        SELECT order_id, customer_id, total_amount, status, created_at
+        FROM orders
+    """
+    if conditions:
+        query_orders += " WHERE " + " AND ".join(conditions)
+    query_orders += " ORDER BY created_at DESC, order_id DESC"
+    if limit is not None:
+        query_orders += " LIMIT %s"
+        params.append(limit)
+    return query_orders, tuple(params)
+
+def fetch_items_for_orders(cursor, order_ids):
+    # Returns {order_id: [item rows]} using one IN (...) query per batch of ids
+    items_by_order = {}
+    for start in range(0, len(order_ids), ITEMS_BATCH_SIZE):
+        batch = order_ids[start:start + ITEMS_BATCH_SIZE]
+        placeholders = ", ".join(["%s"] * len(batch))
+        query_items = f"""
+            SELECT order_id, product_id, quantity, unit_price_at_purchase
+            FROM order_items
+            WHERE order_id IN ({placeholders})
+        """
+        cursor.execute(query_items, tuple(batch))
+        for item in cursor.fetchall():
+            items_by_order.setdefault(item['order_id'], []).append(item)
+    return items_by_order
 
 @app.route('/', methods=['GET'])
 def health_check():
-    return jsonify({"service": "order_service", "status": "active"})
+    return jsonify({
+        "service": "order_service",
+        "status": "active",
+        "db_pool": db_pool.stats(),
+        "order_cache": order_cache.stats()
+    })
 
 @app.route('/api/orders', methods=['GET'])
 def get_all_orders():
-    # Get customer_id from query parameters (e.g., /api/orders?customer_id=1)
+    # Query parameters:
+    #   customer_id - only this customer's orders (e.g., /api/orders?customer_id=1)
+    #   limit       - page size; the unfiltered listing is always paginated
+    #   after       - next_cursor from the previous page (keyset on created_at, order_id)
+    #   format      - "ndjson" streams one order per line instead of a JSON page
     customer_id = request.args.get('customer_id')
-    
+    stream = request.args.get('format') == 'ndjson'
+
+    try:
+        after = decode_cursor(request.args.get('after'))
+        limit = request.args.get('limit', type=int)
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid 'after' cursor or 'limit'"}), 400
+
+    if limit is not None and limit < 1:
+        return jsonify({"error": "'limit' must be a positive integer"}), 400
+    if not stream:
+        if limit is None and not customer_id:
+            limit = DEFAULT_PAGE_SIZE
+        if limit is not None:
+            limit = min(limit, MAX_PAGE_SIZE)
+
+    query_orders, params = build_orders_query(customer_id, after, limit)
+
+    if stream:
+        return stream_orders(query_orders, params)
+
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
     
     try:
-        # Build query based on whether customer_id is provided
-        if customer_id:
-            # Filter by specific customer
-            query_orders = """
-                SELECT order_id, customer_id, total_amount, status, created_at
-                FROM orders
-                WHERE customer_id = %s
-                ORDER BY created_at DESC
-            """
-            cursor.execute(query_orders, (customer_id,))
-        else:
-            # Return all orders (no filter)
-            query_orders = """
-                SELECT order_id, customer_id, total_amount, status, created_at
-                FROM orders
-                ORDER BY created_at DESC
-            """
-            cursor.execute(query_orders)
-        
+        cursor.execute(query_orders, params)
         orders = cursor.fetchall()
         
         # If no orders found for this customer, return empty list
         if not orders:
             return jsonify({
                 "total_orders": 0,
-                "orders": []
+                "orders": [],
+                "next_cursor": None
             }), 200
         
-        result = []
-        for order in orders:
-            query_items = """
-                SELECT product_id, quantity, unit_price_at_purchase
-                FROM order_items
-                WHERE order_id = %s
-            """
-            cursor.execute(query_items, (order['order_id'],))
-            items = cursor.fetchall()
-            
-            order_data = {
-                "order_id": order['order_id'],
-                "customer_id": order['customer_id'],
-                "total_amount": float(order['total_amount']),
-                "status": order['status'],
-                "created_at": order['created_at'].isoformat() if order['created_at'] else None,
-                "items": [
-                    {
-                        "product_id": item['product_id'],
-                        "quantity": item['quantity'],
-                        "unit_price": float(item['unit_price_at_purchase'])
-                    }
-                    for item in items
-                ]
-            }
-            result.append(order_data)
+        # Fetch the items of every order in the result set in one go
+        # instead of one query per order (N+1)
+        items_by_order = fetch_items_for_orders(cursor, [order['order_id'] for order in orders])
+
+        result = [
+            serialize_order(order, items_by_order.get(order['order_id'], []))
+            for order in orders
+        ]
+
+        # A full page means there may be more rows after the last one
+        next_cursor = None
+        if limit is not None and len(orders) == limit:
+            next_cursor = encode_cursor(orders[-1])
         
         return jsonify({
             "total_orders": len(result),
-            "orders": result
+            "orders": result,
+            "next_cursor": next_cursor
         }), 200
         
     except mysql.connector.Error as err:
@@ -100,8 +229,167 @@ def get_all_orders():
         if conn:
             conn.close()
 
+def stream_orders(query_orders, params):
+    # Orders are read from an unbuffered (server-side) cursor in chunks, so the
+    # whole table is never held in memory. Items are looked up per chunk on a
+    # second connection because the first one is busy streaming.
+    def generate():
+        conn = items_conn = cursor = items_cursor = None
+        try:
+            conn = get_db_connection()
+            items_conn = get_db_connection()
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            items_cursor = items_conn.cursor(dictionary=True)
+            cursor.execute(query_orders, params)
+            while True:
+                orders = cursor.fetchmany(STREAM_CHUNK_SIZE)
+                if not orders:
+                    break
+                items_by_order = fetch_items_for_orders(items_cursor, [order['order_id'] for order in orders])
+                for order in orders:
+                    order_data = serialize_order(order, items_by_order.get(order['order_id'], []))
+                    yield json.dumps(order_data) + "\n"
+        except mysql.connector.Error as err:
+            # Headers are already sent; report the failure as the last line
+            yield json.dumps({"error": f"Database Error: {err}"}) + "\n"
+        finally:
+            # A failing close must not keep the other connections checked out
+            try:
+                try:
+                    if items_cursor:
+                        items_cursor.close()
+                finally:
+                    if items_conn:
+                        items_conn.close()
+            finally:
+                try:
+                    if cursor:
+                        cursor.close()
+                finally:
+                    if conn:
+                        conn.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def invalidate_order(order_id):
+    # Must be called by anything that writes an order or changes its status
+    order_cache.pop(order_id)
+
+def etag_for(payload):
+    return hashlib.sha1(payload).hexdigest()
+
+def cached_order_response(payload, etag):
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(payload, status=200, mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+def parse_date_range():
+    # ?from=YYYY-MM-DD&to=YYYY-MM-DD, both inclusive; defaults to the last 30 days
+    date_to = request.args.get('to')
+    date_to = date.fromisoformat(date_to) if date_to else date.today()
+    date_from = request.args.get('from')
+    date_from = date.fromisoformat(date_from) if date_from else date_to - timedelta(days=STATS_DEFAULT_DAYS - 1)
+    return date_from, date_to
+
+@app.route('/api/orders/stats', methods=['GET'])
+def get_sales_stats():
+    """
+    Sales figures served from the sales_* rollup tables, never from orders.
+
+    Query parameters: from, to (YYYY-MM-DD, inclusive), top (rows per ranking)
+    """
+    try:
+        date_from, date_to = parse_date_range()
+        top = min(request.args.get('top', STATS_DEFAULT_TOP, type=int), STATS_MAX_TOP)
+    except ValueError:
+        return jsonify({"error": "Invalid date. Use YYYY-MM-DD for 'from' and 'to'."}), 400
+    if date_from > date_to or top < 1:
+        return jsonify({"error": "'from' must not be after 'to' and 'top' must be positive"}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    try:
+        cursor.execute("""
+            SELECT sales_date, orders_count, units_sold, revenue
+            FROM sales_daily
+            WHERE sales_date BETWEEN %s AND %s
+            ORDER BY sales_date
+        """, (date_from, date_to))
+        daily = [
+            {
+                "date": row['sales_date'].isoformat(),
+                "orders": row['orders_count'],
+                "units_sold": int(row['units_sold']),
+                "revenue": float(row['revenue'])
+            }
+            for row in cursor.fetchall()
+        ]
+
+        cursor.execute("""
+            SELECT product_id, SUM(units_sold) AS units_sold, SUM(revenue) AS revenue
+            FROM sales_product_daily
+            WHERE sales_date BETWEEN %s AND %s
+            GROUP BY product_id
+            ORDER BY units_sold DESC
+            LIMIT %s
+        """, (date_from, date_to, top))
+        top_products = [
+            {
+                "product_id": row['product_id'],
+                "units_sold": int(row['units_sold']),
+                "revenue": float(row['revenue'])
+            }
+            for row in cursor.fetchall()
+        ]
+
+        cursor.execute("""
+            SELECT customer_id, SUM(orders_count) AS orders_count, SUM(revenue) AS revenue
+            FROM sales_customer_daily
+            WHERE sales_date BETWEEN %s AND %s
+            GROUP BY customer_id
+            ORDER BY orders_count DESC
+            LIMIT %s
+        """, (date_from, date_to, top))
+        top_customers = [
+            {
+                "customer_id": row['customer_id'],
+                "orders": int(row['orders_count']),
+                "revenue": float(row['revenue'])
+            }
+            for row in cursor.fetchall()
+        ]
+
+        return jsonify({
+            "from": date_from.isoformat(),
+            "to": date_to.isoformat(),
+            "totals": {
+                "orders": sum(day['orders'] for day in daily),
+                "units_sold": sum(day['units_sold'] for day in daily),
+                "revenue": round(sum(day['revenue'] for day in daily), 2)
+            },
+            "daily": daily,
+            "top_products": top_products,
+            "top_customers": top_customers
+        }), 200
+
+    except mysql.connector.Error as err:
+        return jsonify({"error": f"Database Error: {err}"}), 500
+
+    finally:
+        cursor.close()
+        conn.close()
+
 @app.route('/api/orders/<int:order_id>', methods=['GET'])
 def get_order(order_id):
+    # Serialized responses are cached per order (read-through, TTL + LRU)
+    # and carry an ETag so clients can revalidate with If-None-Match
+    cached = order_cache.get(order_id)
+    if cached is not None:
+        return cached_order_response(*cached)
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -126,23 +414,11 @@ def get_order(order_id):
         cursor.execute(query_items, (order_id,))
         items = cursor.fetchall()
         
-        response = {
-            "order_id": order['order_id'],
-            "customer_id": order['customer_id'],
-            "total_amount": float(order['total_amount']),
-            "status": order['status'],
-            "created_at": order['created_at'].isoformat() if order['created_at'] else None,
-            "items": [
-                {
-                    "product_id": item['product_id'],
-                    "quantity": item['quantity'],
-                    "unit_price": float(item['unit_price_at_purchase'])
-                }
-                for item in items
-            ]
-        }
+        payload = jsonify(serialize_order(order, items)).get_data()
+        etag = etag_for(payload)
+        order_cache.set(order_id, (payload, etag))
         
-        return jsonify(response), 200
+        return cached_order_response(payload, etag)
         
     except mysql.connector.Error as err:
         return jsonify({"error": f"Database Error: {err}"}), 500
@@ -157,113 +433,582 @@ def get_order(order_id):
             conn.close()
 
 
-@app.route('/api/orders/create', methods=['POST'])
-def create_order():
-    data = request.get_json()
-    
+class OrderError(Exception):
+    # Carries the JSON body and status code the endpoint should answer with
+    def __init__(self, body, status):
+        super().__init__(body.get('error'))
+        self.body = body
+        self.status = status
+
+def reserve_stock(lines):
+    """
+    Decrement stock for every line and return {product_id: unit_price}.
+    Uses the all-or-nothing batch endpoint; falls back to concurrent
+    per-line calls when it is disabled or the inventory service predates it.
+    Raises OrderError when the order cannot be fulfilled.
+    """
+    if USE_BATCH_RESERVE:
+        prices = reserve_stock_batch(lines)
+        if prices is not None:
+            return prices
+    return reserve_stock_concurrently(lines)
+
+def reserve_stock_batch(lines):
+    # Returns None if the inventory service has no batch endpoint
+    try:
+        reserve_response = inventory_client.post(
+            '/api/inventory/batch/reserve',
+            json={"items": lines}
+        )
+    except requests.exceptions.RequestException:
+        raise OrderError({"error": "Failed to connect to Inventory Service"}, 503)
+
+    if reserve_response.status_code == 404:
+        missing = reserve_response.json().get('missing_product_ids')
+        if missing is None:
+            return None
+        raise OrderError({"error": f"Product {', '.join(map(str, missing))} not found in inventory"}, 404)
+    if reserve_response.status_code != 200:
+        raise OrderError({
+            "error": "Stock update failed", 
+            "details": reserve_response.json()
+        }, 400)
+
+    return {
+        reserved['product_id']: reserved['unit_price']
+        for reserved in reserve_response.json()['items']
+    }
+
+def reserve_line(line):
+    # Check + decrement a single line; returns (unit_price, error) and never raises
+    p_id = line['product_id']
+    try:
+        price_response = inventory_client.get(f'/api/inventory/check/{p_id}')
+        if price_response.status_code != 200:
+            return None, OrderError({"error": f"Product {p_id} not found in inventory"}, 404)
+        current_price = price_response.json()['unit_price']
+    except requests.exceptions.RequestException:
+        return None, OrderError({"error": "Failed to connect to Inventory Service"}, 503)
+
+    update_payload = {"product_id": p_id, "quantity_change": -line['quantity']}
+    try:
+        update_response = inventory_client.put('/api/inventory/update', json=update_payload)
+        if update_response.status_code != 200:
+            return None, OrderError({
+                "error": "Stock update failed", 
+                "details": update_response.json()
+            }, 400)
+    except requests.exceptions.RequestException:
+        # The decrement may or may not have been applied; it is not compensated
+        return None, OrderError({"error": "Failed to connect to Inventory Service for update"}, 503)
+
+    return current_price, None
+
+def reserve_stock_concurrently(lines):
+    """
+    Per-line check + decrement with at most ORDER_LINE_CONCURRENCY calls in
+    flight. If any line fails, the lines that were decremented are restored.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(ORDER_LINE_CONCURRENCY, len(lines)))) as executor:
+        outcomes = list(executor.map(reserve_line, lines))
+
+    failures = [error for _, error in outcomes if error]
+    if failures:
+        reserved = [line for line, (_, error) in zip(lines, outcomes) if not error]
+        release_stock_lines(reserved)
+        raise failures[0]
+
+    return {line['product_id']: price for line, (price, _) in zip(lines, outcomes)}
+
+def release_stock_lines(lines):
+    # Per-line compensation, run with the same concurrency bound
+    def release(line):
+        try:
+            inventory_client.put('/api/inventory/update', json={
+                "product_id": line['product_id'],
+                "quantity_change": line['quantity']
+            })
+        except requests.exceptions.RequestException:
+            print(f"Failed to restock {line} after order failure")
+
+    if not lines:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(ORDER_LINE_CONCURRENCY, len(lines)))) as executor:
+        list(executor.map(release, lines))
+
+def restock(lines):
+    # Give back stock reserved for an order that could not be saved
+    if not lines:
+        return
+    try:
+        restock_response = inventory_client.post('/api/inventory/batch/restock', json={"items": lines})
+        if restock_response.status_code == 404:
+            release_stock_lines(lines)
+    except requests.exceptions.RequestException:
+        print(f"Failed to restock {lines} after order failure")
+
+def parse_lines(products):
+    return [
+        {"product_id": int(item['product_id']), "quantity": int(item['quantity'])}
+        for item in products
+    ]
+
+def price_lines(lines, prices):
+    # Returns (order total, order_items rows) for lines priced from `prices`
+    total_order_amount = 0
+    items_buffer = []
+
+    for line in lines:
+        current_price = prices[line['product_id']]
+        total_order_amount += current_price * line['quantity']
+
+        items_buffer.append({
+            "product_id": line['product_id'],
+            "quantity": line['quantity'],
+            "unit_price": current_price 
+        })
+    return total_order_amount, items_buffer
+
+def insert_order(cursor, customer_id, total_order_amount, items_buffer):
+    # Inserts the order header and all of its items; the caller commits
+    query_header = """
+        INSERT INTO orders (customer_id, total_amount, status, created_at)
+        VALUES (%s, %s, 'CONFIRMED', NOW())
+    """
+    cursor.execute(query_header, (customer_id, total_order_amount))
+
+    new_order_id = cursor.lastrowid
+
+    # executemany turns an INSERT ... VALUES into one multi-row statement
+    query_items = """
+        INSERT INTO order_items (order_id, product_id, quantity, unit_price_at_purchase)
+        VALUES (%s, %s, %s, %s)
+    """
+    cursor.executemany(query_items, [
+        (new_order_id, item['product_id'], item['quantity'], item['unit_price'])
+        for item in items_buffer
+    ])
+
+    record_sales(cursor, customer_id, total_order_amount, items_buffer)
+    return new_order_id
+
+def record_sales(cursor, customer_id, total_order_amount, items_buffer):
+    # Keeps the sales_* rollup tables current in the order's own transaction
+    # (see backend/database/migrations/003_sales_rollups.sql)
+    cursor.execute("""
+        INSERT INTO sales_daily (sales_date, orders_count, units_sold, revenue)
+        VALUES (CURDATE(), 1, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            orders_count = orders_count + 1,
+            units_sold = units_sold + VALUES(units_sold),
+            revenue = revenue + VALUES(revenue)
+    """, (sum(item['quantity'] for item in items_buffer), total_order_amount))
+
+    cursor.execute("""
+        INSERT INTO sales_customer_daily (sales_date, customer_id, orders_count, revenue)
+        VALUES (CURDATE(), %s, 1, %s)
+        ON DUPLICATE KEY UPDATE
+            orders_count = orders_count + 1,
+            revenue = revenue + VALUES(revenue)
+    """, (customer_id, total_order_amount))
+
+    # One row per product even if it appears on several lines
+    per_product = {}
+    for item in items_buffer:
+        units, revenue = per_product.get(item['product_id'], (0, 0))
+        per_product[item['product_id']] = (units + item['quantity'], revenue + item['unit_price'] * item['quantity'])
+
+    cursor.executemany("""
+        INSERT INTO sales_product_daily (sales_date, product_id, units_sold, revenue)
+        VALUES (CURDATE(), %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            units_sold = units_sold + VALUES(units_sold),
+            revenue = revenue + VALUES(revenue)
+    """, [(product_id, units, revenue) for product_id, (units, revenue) in per_product.items()])
+
+def place_order(data):
+    # Reserves stock and saves one order; returns (response body, status code)
+
     # Validate Inputs
     if not data or 'customer_id' not in data or 'products' not in data:
-        return jsonify({"error": "Invalid input. 'customer_id' and 'products' are required."}), 400
+        return {"error": "Invalid input. 'customer_id' and 'products' are required."}, 400
 
     customer_id = data.get('customer_id')
     products = data.get('products') 
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    conn = None
+    cursor = None
+    reserved_lines = None
 
     try:
-        total_order_amount = 0
-        items_buffer = []
+        # Checked out before any stock is reserved
+        conn = get_db_connection()
+        cursor = conn.cursor()
 
+        lines = parse_lines(products)
 
-        for item in products:
-            p_id = item['product_id']
-            qty = int(item['quantity'])
+        try:
+            prices = reserve_stock(lines)
+        except OrderError as err:
+            return err.body, err.status
+        reserved_lines = lines
 
+        total_order_amount, items_buffer = price_lines(lines, prices)
+        new_order_id = insert_order(cursor, customer_id, total_order_amount, items_buffer)
 
-            try:
-                price_response = requests.get(f'http://localhost:5002/api/inventory/check/{p_id}')
-                if price_response.status_code != 200:
-                    return jsonify({"error": f"Product {p_id} not found in inventory"}), 404
-                
-                current_price = price_response.json()['unit_price']
-                
-            except requests.exceptions.RequestException:
-                return jsonify({"error": "Failed to connect to Inventory Service"}), 503
+        conn.commit()
+        reserved_lines = None
+        invalidate_order(new_order_id)
+
+        return {
+            "status": "success",
+            "message": "Order created successfully",
+            "order_id": new_order_id,
+            "total_amount": total_order_amount,
+            "items_count": len(items_buffer)
+        }, 201
+
+    except mysql.connector.Error as err:
+        rollback_quietly(conn)
+        restock(reserved_lines)
+        if err.errno == 1452:
+            return {"error": "Database Constraint Error: Customer ID or Product ID does not exist."}, 400
+        return {"error": f"Database Error: {err}"}, 500
 
+    except Exception as e:
+        rollback_quietly(conn)
+        restock(reserved_lines)
+        return {"error": f"Server Error: {str(e)}"}, 500
+    
+    finally:
+        try:
+            if cursor:
+                cursor.close()
+        finally:
+            if conn:
+                conn.close()
+
+def rollback_quietly(conn):
+    # The original error is the one worth reporting
+    if conn:
+        try:
+            conn.rollback()
+        except mysql.connector.Error:
+            pass
+
+def request_fingerprint(data):
+    # Canonical hash of the request body, to reject key reuse with a different payload
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+@contextmanager
+def idempotency_key_lock(key):
+    # Serializes requests for the same key inside this process, so concurrent
+    # duplicates wait on a lock instead of polling the database
+    with _key_locks_guard:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _key_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _key_locks[key]
+
+def claim_idempotency_key(key, fingerprint):
+    """
+    Registers `key` as in progress for this request and returns None, or
+    returns the stored (fingerprint, body, status) of a completed request.
+    While another process holds the key, polls until it finishes; raises
+    OrderError(409) if it is still running after IDEMPOTENCY_WAIT_SECONDS.
+    An in-progress claim older than IDEMPOTENCY_STALE_SECONDS is taken over.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
 
-            update_payload = {"product_id": p_id, "quantity_change": -qty}
+    try:
+        while True:
             try:
-                update_response = requests.put('http://localhost:5002/api/inventory/update', json=update_payload)
-                
-                if update_response.status_code != 200:
-
-                    conn.rollback()
-                    return jsonify({
-                        "error": "Stock update failed", 
-                        "details": update_response.json()
-                    }), 400
-            except requests.exceptions.RequestException:
+                cursor.execute("""
+                    INSERT INTO idempotency_keys (idempotency_key, request_hash, status, created_at, updated_at)
+                    VALUES (%s, %s, 'IN_PROGRESS', NOW(), NOW())
+                """, (key, fingerprint))
+                conn.commit()
+                return None
+            except mysql.connector.IntegrityError:
                 conn.rollback()
-                return jsonify({"error": "Failed to connect to Inventory Service for update"}), 503
 
-            line_total = current_price * qty
-            total_order_amount += line_total
+            cursor.execute("""
+                SELECT request_hash, status, response_status, response_body,
+                       TIMESTAMPDIFF(SECOND, updated_at, NOW()) AS age_seconds
+                FROM idempotency_keys
+                WHERE idempotency_key = %s
+            """, (key,))
+            row = cursor.fetchone()
+            # End the read snapshot so the next poll sees other sessions' commits
+            conn.rollback()
+
+            if row is None:
+                # The previous attempt failed and released the key
+                continue
+            if row['request_hash'] != fingerprint:
+                raise OrderError({"error": "Idempotency-Key was already used with a different request body"}, 422)
+            if row['status'] == 'COMPLETED':
+                return row['request_hash'], json.loads(row['response_body']), row['response_status']
+
+            if row['age_seconds'] >= IDEMPOTENCY_STALE_SECONDS:
+                cursor.execute("""
+                    UPDATE idempotency_keys
+                    SET updated_at = NOW()
+                    WHERE idempotency_key = %s AND status = 'IN_PROGRESS'
+                      AND TIMESTAMPDIFF(SECOND, updated_at, NOW()) >= %s
+                """, (key, IDEMPOTENCY_STALE_SECONDS))
+                conn.commit()
+                if cursor.rowcount == 1:
+                    return None
+
+            if time.monotonic() >= deadline:
+                raise OrderError({"error": "A request with this Idempotency-Key is still in progress"}, 409)
+            time.sleep(IDEMPOTENCY_POLL_SECONDS)
+    finally:
+        cursor.close()
+        conn.close()
+
+def save_idempotent_response(key, fingerprint, body, status):
+    # Final answers (2xx / 4xx) are stored for replay. Server-side failures
+    # release the key instead so that a retry runs the order again.
+    if status >= 500:
+        release_idempotency_key(key)
+        return
+    conn = None
+    cursor = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE idempotency_keys
+            SET status = 'COMPLETED', response_status = %s, response_body = %s, updated_at = NOW()
+            WHERE idempotency_key = %s
+        """, (status, json.dumps(body), key))
+        conn.commit()
+        idempotency_cache.set(key, (fingerprint, body, status))
+    except mysql.connector.Error as err:
+        print(f"Failed to save idempotent response for key {key}: {err}")
+    finally:
+        try:
+            if cursor:
+                cursor.close()
+        finally:
+            if conn:
+                conn.close()
+
+def release_idempotency_key(key):
+    # Deletes an in-progress claim so a retry can run the order again. If
+    # even that fails, the claim is taken over once it is stale.
+    conn = None
+    cursor = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM idempotency_keys WHERE idempotency_key = %s AND status = 'IN_PROGRESS'", (key,))
+        conn.commit()
+    except mysql.connector.Error as err:
+        print(f"Failed to release idempotency key {key}: {err}")
+    finally:
+        try:
+            if cursor:
+                cursor.close()
+        finally:
+            if conn:
+                conn.close()
 
+@app.route('/api/orders/create', methods=['POST'])
+def create_order():
+    data = request.get_json()
+    key = request.headers.get('Idempotency-Key')
 
-            items_buffer.append({
-                "product_id": p_id,
-                "quantity": qty,
-                "unit_price": current_price 
-            })
+    if not key:
+        body, status = place_order(data)
+        return jsonify(body), status
 
-        query_header = """
-            INSERT INTO orders (customer_id, total_amount, status, created_at)
-            VALUES (%s, %s, 'CONFIRMED', NOW())
-        """
-        cursor.execute(query_header, (customer_id, total_order_amount))
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return jsonify({"error": f"Idempotency-Key must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters"}), 400
 
-        new_order_id = cursor.lastrowid
+    fingerprint = request_fingerprint(data)
 
+    try:
+        with idempotency_key_lock(key):
+            stored = idempotency_cache.get(key)
+            if stored is None:
+                stored = claim_idempotency_key(key, fingerprint)
+
+            if stored is None:
+                try:
+                    body, status = place_order(data)
+                except Exception:
+                    release_idempotency_key(key)
+                    raise
+                save_idempotent_response(key, fingerprint, body, status)
+                return jsonify(body), status
+    except OrderError as err:
+        return jsonify(err.body), err.status
+    except mysql.connector.Error as err:
+        return jsonify({"error": f"Database Error: {err}"}), 500
 
-        query_items = """
-            INSERT INTO order_items (order_id, product_id, quantity, unit_price_at_purchase)
-            VALUES (%s, %s, %s, %s)
-        """
-        
-        for item in items_buffer:
-            cursor.execute(query_items, (
-                new_order_id,
-                item['product_id'],
-                item['quantity'],
-                item['unit_price']
-            ))
+    stored_fingerprint, body, status = stored
+    if stored_fingerprint != fingerprint:
+        return jsonify({"error": "Idempotency-Key was already used with a different request body"}), 422
+    idempotency_cache.set(key, stored)
+    response = jsonify(body)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response, status
+
+
+def reserve_chunk(entries):
+    """
+    Reserve stock for a chunk of (index, customer_id, lines) entries with a
+    single inventory call. If the combined reservation is refused, falls back
+    to reserving order by order so one bad order does not fail its neighbours.
+    Returns ([(entry, prices)], [(index, error body, status)]).
+    """
+    combined = [line for _, _, lines in entries for line in lines]
+    try:
+        prices = reserve_stock(combined)
+        return [(entry, prices) for entry in entries], []
+    except OrderError as err:
+        if len(entries) == 1 or err.status >= 500:
+            return [], [(index, err.body, err.status) for index, _, _ in entries]
+
+    reserved, failed = [], []
+    for entry in entries:
+        try:
+            reserved.append((entry, reserve_stock(entry[2])))
+        except OrderError as err:
+            failed.append((entry[0], err.body, err.status))
+    return reserved, failed
+
+def save_chunk(reserved, results):
+    # One transaction per chunk; each order gets a savepoint so a constraint
+    # error only drops (and restocks) that order. If the chunk itself fails
+    # (no connection, a savepoint or the commit failing), every order not
+    # already settled is restocked and reported as failed.
+    conn = None
+    cursor = None
+    created = []
+    settled = set()  # indexes already restocked and given a result
+
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        for (index, customer_id, lines), prices in reserved:
+            total_order_amount, items_buffer = price_lines(lines, prices)
+            cursor.execute("SAVEPOINT batch_order")
+            try:
+                new_order_id = insert_order(cursor, customer_id, total_order_amount, items_buffer)
+            except mysql.connector.Error as err:
+                cursor.execute("ROLLBACK TO SAVEPOINT batch_order")
+                restock(lines)
+                if err.errno == 1452:
+                    results[index] = batch_failure(index, {"error": "Database Constraint Error: Customer ID or Product ID does not exist."}, 400)
+                else:
+                    results[index] = batch_failure(index, {"error": f"Database Error: {err}"}, 500)
+                settled.add(index)
+                continue
+            created.append((index, new_order_id, total_order_amount, len(items_buffer), lines))
 
         conn.commit()
 
-        return jsonify({
+    except Exception as err:
+        if conn:
+            try:
+                conn.rollback()
+            except mysql.connector.Error:
+                pass
+        if isinstance(err, mysql.connector.Error):
+            body = {"error": f"Database Error: {err}"}
+        else:
+            body = {"error": f"Server Error: {str(err)}"}
+        for (index, _, lines), _ in reserved:
+            if index not in settled:
+                restock(lines)
+                results[index] = batch_failure(index, body, 500)
+        return
+
+    finally:
+        try:
+            if cursor:
+                cursor.close()
+        finally:
+            if conn:
+                conn.close()
+
+    for index, new_order_id, total_order_amount, items_count, _ in created:
+        invalidate_order(new_order_id)
+        results[index] = {
+            "index": index,
             "status": "success",
-            "message": "Order created successfully",
             "order_id": new_order_id,
             "total_amount": total_order_amount,
-            "items_count": len(items_buffer)
-        }), 201
-
-    except mysql.connector.Error as err:
-        conn.rollback()
-        if err.errno == 1452:
-            return jsonify({"error": "Database Constraint Error: Customer ID or Product ID does not exist."}), 400
-        return jsonify({"error": f"Database Error: {err}"}), 500
+            "items_count": items_count
+        }
 
-    except Exception as e:
-        conn.rollback()
-        return jsonify({"error": f"Server Error: {str(e)}"}), 500
-    
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+def batch_failure(index, body, status):
+    return dict(body, index=index, status="failed", http_status=status)
+
+@app.route('/api/orders/batch', methods=['POST'])
+def create_orders_batch():
+    """
+    Create many orders in one request.
+
+    Request Body (JSON):
+    {
+        "orders": [
+            {"customer_id": 1, "products": [{"product_id": 1, "quantity": 2}]},
+            ...
+        ]
+    }
+
+    Orders are processed in chunks of ORDER_BATCH_CHUNK_SIZE: stock for a
+    chunk is reserved with one inventory call and the chunk is saved with one
+    commit. The response lists the outcome of every order, in request order.
+    """
+    data = request.get_json(silent=True)
+    orders = data.get('orders') if isinstance(data, dict) else None
+
+    if not isinstance(orders, list) or not orders:
+        return jsonify({"error": "Invalid input. 'orders' must be a non-empty list."}), 400
+    if len(orders) > ORDER_BATCH_MAX_ORDERS:
+        return jsonify({"error": f"At most {ORDER_BATCH_MAX_ORDERS} orders per batch"}), 400
+
+    results = [None] * len(orders)
+    entries = []
+    for index, order in enumerate(orders):
+        if not isinstance(order, dict) or 'customer_id' not in order or not order.get('products'):
+            results[index] = batch_failure(index, {"error": "Invalid input. 'customer_id' and 'products' are required."}, 400)
+            continue
+        try:
+            entries.append((index, order['customer_id'], parse_lines(order['products'])))
+        except (KeyError, TypeError, ValueError):
+            results[index] = batch_failure(index, {"error": "Invalid product line. 'product_id' and 'quantity' must be integers."}, 400)
+
+    for start in range(0, len(entries), ORDER_BATCH_CHUNK_SIZE):
+        chunk = entries[start:start + ORDER_BATCH_CHUNK_SIZE]
+        reserved, failed = reserve_chunk(chunk)
+        for index, body, status in failed:
+            results[index] = batch_failure(index, body, status)
+        if reserved:
+            save_chunk(reserved, results)
+
+    succeeded = sum(1 for result in results if result['status'] == 'success')
+    return jsonify({
+        "total_orders": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }), 200
 
 
 if __name__ == '__main__':
@@ -1,6 +1,20 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 import mysql.connector
+import numpy as np
 import requests
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_right
+
+# backend/services holds the helpers shared by every service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from shared.cache import LRUCache
+from shared.db import ConnectionPool
+from shared.http_client import get_client
 
 app = Flask(__name__)
 
@@ -11,17 +25,348 @@ db_config = {
     'database': 'ecommerce_system'
 }
 
-INVENTORY_SERVICE_URL = "http://localhost:5002/api/inventory/check"
+INVENTORY_SERVICE_URL = os.environ.get('INVENTORY_SERVICE_URL', "http://localhost:5002") + "/api/inventory/check"
+inventory_client = get_client(INVENTORY_SERVICE_URL)
+# Ids per inventory check call; must not exceed inventory_service's MAX_CHECK_IDS
+MAX_CHECK_IDS = int(os.environ.get('MAX_CHECK_IDS', 1000))
+
+db_pool = ConnectionPool(db_config, pool_name='pricing_service')
+
+# Seconds between checks of pricing_versions for rule and tax changes
+PRICING_REFRESH_INTERVAL = float(os.environ.get('PRICING_REFRESH_INTERVAL', 5))
+DEFAULT_TAX_RATE = 14.0
+
+# Local price replica (see PriceReplica)
+PRICE_REPLICA_MAX_STALENESS = float(os.environ.get('PRICE_REPLICA_MAX_STALENESS', 30))
+PRICE_REPLICA_POLL_WAIT = float(os.environ.get('PRICE_REPLICA_POLL_WAIT', 20))
+PRICE_REPLICA_LOAD_TIMEOUT = float(os.environ.get('PRICE_REPLICA_LOAD_TIMEOUT', 60))
+PRICE_REPLICA_REWIND = int(os.environ.get('PRICE_REPLICA_REWIND', 1000))
+PRICE_REPLICA_RESYNC_AFTER = float(os.environ.get('PRICE_REPLICA_RESYNC_AFTER', 3600))
+
+# Quote cache: recent calculate_pricing results per normalized cart
+QUOTE_CACHE_SIZE = int(os.environ.get('QUOTE_CACHE_SIZE', 5000))
+QUOTE_CACHE_TTL = float(os.environ.get('QUOTE_CACHE_TTL', 10))
+BATCH_MAX_CARTS = int(os.environ.get('BATCH_MAX_CARTS', 10000))
+# Carts with at least this many priced lines use the NumPy kernel
+VECTOR_PRICING_MIN_LINES = int(os.environ.get('VECTOR_PRICING_MIN_LINES', 256))
+quote_cache = LRUCache(QUOTE_CACHE_SIZE, ttl=QUOTE_CACHE_TTL)
+
+# Part of every quote key. Bumped whenever rules, tax rates or prices
+# change, so a quote computed from old data can never be served again,
+# even one stored by a request that was still running when the data changed.
+quote_generation = 0
+_quote_generation_lock = threading.Lock()
+
+def invalidate_quotes():
+    global quote_generation
+    with _quote_generation_lock:
+        quote_generation += 1
+    quote_cache.clear()
+
+def quote_key(products_list, region, generation):
+    # Same cart, any line order -> same key. json.dumps keeps 1 and "1" apart.
+    pairs = sorted((json.dumps(item.get('product_id')), json.dumps(item.get('quantity', 1)))
+                   for item in products_list)
+    raw = json.dumps([generation, region, pairs])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def in_request_order(quote, products_list):
+    # A cached quote may come from the same cart listed in another order
+    lines = {}
+    for line in quote['breakdown']:
+        lines.setdefault((line['product_id'], line['quantity']), []).append(line)
+    breakdown = []
+    for item in products_list:
+        matching = lines.get((item.get('product_id'), item.get('quantity', 1)))
+        if matching:
+            breakdown.append(matching.pop(0))
+    return dict(quote, breakdown=breakdown)
 
 def get_db_connection():
     try:
-        return mysql.connector.connect(**db_config)
+        return db_pool.get_connection()
     except mysql.connector.Error as err:
         return None
 
+class PricingRules:
+    # Immutable snapshot of pricing_rules: per product, the min_quantity
+    # thresholds in ascending order and the discount of each tier.
+    def __init__(self, rows, version):
+        tiers = {}
+        for row in sorted(rows, key=lambda r: (r['product_id'], r['min_quantity'])):
+            thresholds, discounts = tiers.setdefault(row['product_id'], ([], []))
+            thresholds.append(row['min_quantity'])
+            discounts.append(float(row['discount_percentage']))
+        self.tiers = {p_id: (tuple(t), tuple(d)) for p_id, (t, d) in tiers.items()}
+        self.version = version
+        self.loaded_at = time.time()
+        self.summary = {"products": len(self.tiers), "rules": len(rows)}
+
+    def discount_for(self, product_id, quantity):
+        # Highest tier whose min_quantity <= quantity, same as the old
+        # ORDER BY min_quantity DESC LIMIT 1 query. Tiers are keyed by int;
+        # the query compared numerically, so "1" matches product 1 too.
+        if not is_product_id(product_id):
+            return 0.0
+        tier = self.tiers.get(int(product_id))
+        if not tier:
+            return 0.0
+        index = bisect_right(tier[0], quantity) - 1
+        return tier[1][index] if index >= 0 else 0.0
+
+class TaxRates:
+    # Immutable snapshot of tax_rates. Regions are matched case-insensitively,
+    # like the old WHERE region = %s under MySQL's default collation.
+    def __init__(self, rows, version):
+        self.rates = {region_key(row['region']): float(row['tax_rate']) for row in rows}
+        self.version = version
+        self.loaded_at = time.time()
+        self.summary = {"regions": len(self.rates)}
+
+    def rate_for(self, region):
+        return self.rates.get(region_key(region), DEFAULT_TAX_RATE)
+
+def region_key(region):
+    return region.lower() if isinstance(region, str) else region
+
+# name -> (full-table query, snapshot class). The name is also the row in
+# pricing_versions whose counter the table's triggers bump.
+SNAPSHOT_SOURCES = {
+    'pricing_rules': ("SELECT product_id, min_quantity, discount_percentage FROM pricing_rules", PricingRules),
+    'tax_rates': ("SELECT region, tax_rate FROM tax_rates", TaxRates),
+}
+
+# Current snapshot per name. A reload replaces the entry with one
+# assignment and requests take a reference once, so a reload never changes
+# the rules or rates halfway through pricing a cart. Warm requests need no
+# DB connection.
+snapshots = {}
+_snapshots_lock = threading.Lock()
+# name -> when a request may next try to load a snapshot that failed to load
+_load_retry_at = {}
+
+def fetch_versions(cursor):
+    # Empty when the version table is missing: every refresh then reloads
+    try:
+        cursor.execute("SELECT name, version FROM pricing_versions")
+        return {row['name']: row['version'] for row in cursor.fetchall()}
+    except mysql.connector.Error:
+        return {}
+
+def refresh_snapshots(names=None, force=False):
+    # Reloads each snapshot whose pricing_versions counter moved (every one
+    # with force), on one connection with one version query
+    with _snapshots_lock:
+        reload_snapshots(names, force)
+
+def reload_snapshots(names, force):
+    # Called with _snapshots_lock held
+    conn = get_db_connection()
+    if not conn:
+        return
+    cursor = conn.cursor(dictionary=True)
+    try:
+        versions = fetch_versions(cursor)
+        for name in names or SNAPSHOT_SOURCES:
+            current = snapshots.get(name)
+            version = versions.get(name)
+            if not force and current is not None and version is not None and version == current.version:
+                continue
+            query, snapshot_class = SNAPSHOT_SOURCES[name]
+            cursor.execute(query)
+            snapshots[name] = snapshot_class(cursor.fetchall(), version)
+            invalidate_quotes()
+    except mysql.connector.Error as err:
+        print(f"Error loading pricing data: {err}")
+    finally:
+        cursor.close()
+        conn.close()
+
+def current_snapshot(name):
+    # Loads on first use; after that the refresher keeps it current. While
+    # the database is unreachable a request tries at most once per
+    # PRICING_REFRESH_INTERVAL; the others price without the snapshot
+    # instead of queueing behind connection attempts.
+    snapshot = snapshots.get(name)
+    if snapshot is None and time.monotonic() >= _load_retry_at.get(name, 0.0):
+        with _snapshots_lock:
+            # Requests that waited on a failed attempt do not repeat it
+            if snapshots.get(name) is None and time.monotonic() >= _load_retry_at.get(name, 0.0):
+                reload_snapshots([name], False)
+                if name not in snapshots:
+                    _load_retry_at[name] = time.monotonic() + PRICING_REFRESH_INTERVAL
+        snapshot = snapshots.get(name)
+    return snapshot
+
+def pricing_refresher():
+    while True:
+        time.sleep(PRICING_REFRESH_INTERVAL)
+        refresh_snapshots()
+
+def start_pricing_refresher():
+    refresher = threading.Thread(target=pricing_refresher, name="pricing-refresher", daemon=True)
+    refresher.start()
+    return refresher
+
+def snapshot_summary(name):
+    snapshot = snapshots.get(name)
+    if snapshot is None:
+        return {"loaded": False}
+    return dict(snapshot.summary, loaded=True, version=snapshot.version, loaded_at=snapshot.loaded_at)
+
+def reload_response(name):
+    refresh_snapshots([name], force=True)
+    if name not in snapshots:
+        return jsonify({"error": f"{name} could not be loaded"}), 503
+    return jsonify({"status": "reloaded", name: snapshot_summary(name)}), 200
+
+class PriceReplica:
+    # Local copy of product_id -> unit_price / product_name, so quotes need
+    # no call to inventory_service. Bulk-loaded from the inventory export,
+    # then kept current by long-polling the inventory change feed.
+    #
+    # The replica only answers while it has caught up with the feed within
+    # PRICE_REPLICA_MAX_STALENESS seconds; otherwise, and for ids it does
+    # not know, calculate_pricing falls back to a live lookup.
+    def __init__(self):
+        self.products = {}
+        self.position = None  # last change_id applied; None until loaded
+        self.synced_at = 0.0  # when a feed read last reached the end with no gap
+        self.stats = {"hits": 0, "misses": 0, "stale_lookups": 0, "loads": 0, "changes_applied": 0}
+
+    def fresh(self):
+        return self.position is not None and time.monotonic() - self.synced_at <= PRICE_REPLICA_MAX_STALENESS
+
+    def lookup(self, product_ids):
+        # Returns ({str(product_id): entry}, [ids that need a live lookup])
+        if not self.fresh():
+            self.stats["stale_lookups"] += 1
+            return {}, list(product_ids)
+        products = self.products
+        found = {}
+        missing = []
+        for p_id in product_ids:
+            entry = products.get(p_id)
+            if entry:
+                found[str(p_id)] = entry
+            else:
+                missing.append(p_id)
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(missing)
+        return found, missing
+
+    def remember(self, live_products):
+        # Products the feed never mentioned (e.g. added straight to the
+        # table). setdefault, so a newer value from the feed always wins.
+        if self.position is None:
+            return
+        for p_id, entry in live_products.items():
+            if entry and p_id.isdigit():
+                self.products.setdefault(int(p_id), replica_entry(entry))
+
+    def load(self):
+        # Remember the feed head first, then read the export. Replaying the
+        # feed from a little before that head is harmless (every change
+        # carries the full row) and covers writes that were still
+        # committing when the head was read.
+        response = inventory_client.get('/api/inventory/changes', params={'since': 'latest'})
+        response.raise_for_status()
+        head = response.json()['next_since']
+
+        response = inventory_client.get('/api/inventory/export', params={'format': 'ndjson'},
+                                        stream=True, timeout=PRICE_REPLICA_LOAD_TIMEOUT)
+        products = {}
+        try:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                row = json.loads(line)
+                if 'error' in row:
+                    raise ValueError(f"Inventory export failed: {row['error']}")
+                products[row['product_id']] = replica_entry(row)
+        finally:
+            response.close()
+
+        self.products = products
+        invalidate_quotes()
+        self.position = max(0, head - PRICE_REPLICA_REWIND)
+        self.stats["loads"] += 1
+        while self.poll(0):
+            pass
+
+    def poll(self, wait):
+        # Applies the next page of changes; returns True if more are waiting
+        response = inventory_client.get('/api/inventory/changes', params={'since': self.position, 'wait': wait},
+                                        timeout=wait + PRICE_REPLICA_LOAD_TIMEOUT)
+        response.raise_for_status()
+        body = response.json()
+        repriced = False
+        for change in body['changes']:
+            entry = replica_entry(change)
+            # Most changes are stock movements; only price or name edits
+            # affect quotes
+            repriced = repriced or self.products.get(change['product_id']) != entry
+            self.products[change['product_id']] = entry
+        if repriced:
+            invalidate_quotes()
+        self.stats["changes_applied"] += len(body['changes'])
+        self.position = body['next_since']
+        # A read that stopped at a gap has not reached the end of the feed:
+        # newer changes exist behind a write that is still committing
+        if not body['has_more'] and not body.get('at_gap'):
+            self.synced_at = time.monotonic()
+        return body['has_more']
+
+    def run(self):
+        # A long poll never outlasts half the staleness bound, so a quiet
+        # feed does not make the replica look stale
+        wait = min(PRICE_REPLICA_POLL_WAIT, PRICE_REPLICA_MAX_STALENESS / 2)
+        backoff = 1.0
+        while True:
+            try:
+                if self.position is None or time.monotonic() - self.synced_at > PRICE_REPLICA_RESYNC_AFTER:
+                    self.load()
+                self.poll(wait)
+                backoff = 1.0
+            except (requests.exceptions.RequestException, ValueError, KeyError) as err:
+                print(f"Price replica sync failed: {err}")
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    def summary(self):
+        return dict(self.stats, fresh=self.fresh(), products=len(self.products), position=self.position,
+                    synced_seconds_ago=round(time.monotonic() - self.synced_at, 3) if self.position is not None else None)
+
+def replica_entry(row):
+    return {"unit_price": float(row['unit_price']), "product_name": row['product_name']}
+
+price_replica = PriceReplica()
+
+def start_price_replica():
+    syncer = threading.Thread(target=price_replica.run, name="price-replica", daemon=True)
+    syncer.start()
+    return syncer
+
 @app.route('/', methods=['GET'])
 def health_check():
-    return jsonify({"service": "pricing_service", "status": "active"})
+    return jsonify({
+        "service": "pricing_service",
+        "status": "active",
+        "db_pool": db_pool.stats(),
+        "pricing_rules": snapshot_summary('pricing_rules'),
+        "tax_rates": snapshot_summary('tax_rates'),
+        "price_replica": price_replica.summary(),
+        "quote_cache": dict(quote_cache.stats(), generation=quote_generation)
+    })
+
+@app.route('/api/pricing/rules/reload', methods=['POST'])
+def reload_rules():
+    # Admin hook: reload now instead of waiting for the next version check
+    return reload_response('pricing_rules')
+
+@app.route('/api/pricing/tax-rates/invalidate', methods=['POST'])
+def invalidate_tax_rates():
+    # Admin hook: drop the cached rates and load them again right away
+    return reload_response('tax_rates')
 
 @app.route('/api/pricing/calculate', methods=['POST'])
 def calculate_pricing():
@@ -29,78 +374,242 @@ def calculate_pricing():
     products_list = data.get('products', [])
     region = data.get('region', 'EG')
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True) if conn else None
+    try:
+        key = quote_key(products_list, region, quote_generation)
+    except (AttributeError, TypeError):
+        key = None  # Malformed cart; price_cart reports the error
+    cached = quote_cache.get(key) if key else None
+    if cached is not None:
+        response = jsonify(in_request_order(cached, products_list))
+        response.headers['X-Quote-Cache'] = 'hit'
+        return response, 200
 
+    body, status = price_cart(products_list, region)
+    if key and status == 200:
+        quote_cache.set(key, body)
+    response = jsonify(body)
+    response.headers['X-Quote-Cache'] = 'miss'
+    return response, status
+
+def is_product_id(p_id):
+    # Only integer ids (or their decimal strings) can name a product
+    if isinstance(p_id, bool):
+        return False
+    return isinstance(p_id, int) or (isinstance(p_id, str) and p_id.isascii() and p_id.isdigit())
+
+def resolve_products(product_ids):
+    # Prices come from the local replica; inventory check calls of up to
+    # MAX_CHECK_IDS ids cover whatever it cannot answer. Ids that cannot
+    # exist are not looked up and end up missing, like unknown ones.
+    # Returns ({str(product_id): product}, None) or (None, (body, status)).
+    product_ids = list(dict.fromkeys(int(p_id) for p_id in product_ids if is_product_id(p_id)))
+    inventory_products, missing_ids = price_replica.lookup(product_ids)
+    for start in range(0, len(missing_ids), MAX_CHECK_IDS):
+        chunk = missing_ids[start:start + MAX_CHECK_IDS]
+        try:
+            # Read-only lookup, so the POST is safe to retry
+            response = inventory_client.post(INVENTORY_SERVICE_URL, json={"product_ids": chunk}, idempotent=True)
+        except requests.exceptions.RequestException:
+            return None, ({"error": "Failed to connect to Inventory Service (Is it running on 5002?)"}, 503)
+        if response.status_code != 200:
+            return None, ({"error": "Inventory lookup failed", "details": response.json()}, 502)
+        live_products = response.json()['products']
+        price_replica.remember(live_products)
+        inventory_products.update(live_products)
+    return inventory_products, None
+
+def price_lines(prices, quantities, discounts):
+    # Scalar pricing: per-line totals rounded to cents, and the unrounded
+    # subtotal accumulated in line order
     order_subtotal = 0
-    itemized_breakdown = []
+    line_totals = []
+    for base_price, qty, discount_percent in zip(prices, quantities, discounts):
+        total_item_price = base_price * qty
+        discount_amount = total_item_price * (discount_percent / 100)
+        final_item_price = total_item_price - discount_amount
+
+        order_subtotal += final_item_price
+        line_totals.append(round(final_item_price, 2))
+    return line_totals, order_subtotal
+
+def round_cents(values):
+    # Same result as round(value, 2) on every element. rint(value * 100)
+    # can only disagree with it when value * 100 lands within rounding
+    # error of a half cent, so those few elements are redone with round().
+    scaled = values * 100
+    cents = np.rint(scaled) / 100
+    fraction = scaled - np.floor(scaled)
+    near_half = np.flatnonzero(np.abs(fraction - 0.5) <= 4 * np.spacing(np.abs(scaled)))
+    for index in near_half:
+        cents[index] = round(float(values[index]), 2)
+    return cents
+
+def price_lines_vectorized(prices, quantities, discounts):
+    # price_lines over arrays in one pass. Each step is the same float64
+    # operation in the same order, and accumulate adds strictly left to
+    # right, so totals and subtotal match the scalar path exactly.
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    discounts = np.asarray(discounts, dtype=np.float64)
+    if not len(prices):
+        return [], 0
+
+    total_item_price = prices * quantities
+    discount_amount = total_item_price * (discounts / 100)
+    final_item_price = total_item_price - discount_amount
+
+    order_subtotal = float(np.add.accumulate(final_item_price)[-1])
+    return round_cents(final_item_price).tolist(), order_subtotal
+
+def quote_lines(products_list, inventory_products, discount_for, tax_rate):
+    # Prices one cart from already-resolved products, discounts and tax rate
+    lines = []
+    for item in products_list:
+        p_id = item.get('product_id')
+        qty = item.get('quantity', 1)
+        inventory_data = inventory_products.get(str(p_id))
+        if inventory_data:
+            base_price = float(inventory_data.get('unit_price', 0))
+            prod_name = inventory_data.get('product_name', 'Unknown')
+        else:
+            print(f"⚠️ Product {p_id} not found in Inventory Service")
+            continue
+        lines.append((p_id, prod_name, qty, base_price, discount_for(p_id, qty)))
+
+    prices = [line[3] for line in lines]
+    quantities = [line[2] for line in lines]
+    discounts = [line[4] for line in lines]
+    # Large carts go through the array kernel. Anything but plain numeric
+    # quantities stays on the scalar path so it fails or coerces exactly as before.
+    if len(lines) >= VECTOR_PRICING_MIN_LINES and all(type(qty) in (int, float) for qty in quantities):
+        line_totals, order_subtotal = price_lines_vectorized(prices, quantities, discounts)
+    else:
+        line_totals, order_subtotal = price_lines(prices, quantities, discounts)
+
+    itemized_breakdown = [{
+        "product_id": p_id,
+        "name": prod_name,
+        "quantity": qty,
+        "unit_price": base_price,
+        "discount_percent": f"{discount_percent}%",
+        "total": line_total
+    } for (p_id, prod_name, qty, base_price, discount_percent), line_total in zip(lines, line_totals)]
+
+    tax_amount = order_subtotal * (tax_rate / 100)
+    final_total = order_subtotal + tax_amount
+
+    return {
+        "status": "success",
+        "breakdown": itemized_breakdown,
+        "subtotal": round(order_subtotal, 2),
+        "tax_rate": f"{tax_rate}%",
+        "tax_amount": round(tax_amount, 2),
+        "total_price": round(final_total, 2)
+    }
+
+def rule_discount(rules):
+    return rules.discount_for if rules else (lambda p_id, qty: 0.0)
+
+def price_cart(products_list, region):
+    # Returns (body, status)
+    rules = current_snapshot('pricing_rules')
+    taxes = current_snapshot('tax_rates')
 
     try:
-        for item in products_list:
-            p_id = item.get('product_id')
-            qty = item.get('quantity', 1)
-            try:
-                response = requests.get(f"{INVENTORY_SERVICE_URL}/{p_id}")
-                if response.status_code == 200:
-                    inventory_data = response.json()
-                    base_price = float(inventory_data.get('unit_price', 0))
-                    prod_name = inventory_data.get('product_name', 'Unknown')
-                else:
-                    print(f"⚠️ Product {p_id} not found in Inventory Service")
-                    continue
-            except requests.exceptions.ConnectionError:
-                return jsonify({"error": "Failed to connect to Inventory Service (Is it running on 5002?)"}), 503
-            discount_percent = 0.0
-            if cursor:
-                cursor.execute("""
-                               SELECT discount_percentage
-                               FROM pricing_rules
-                               WHERE product_id = %s AND min_quantity <= %s
-                               ORDER BY min_quantity DESC LIMIT 1
-                               """, (p_id, qty))
-                rule = cursor.fetchone()
-                if rule:
-                    discount_percent = float(rule['discount_percentage'])
-
-            total_item_price = base_price * qty
-            discount_amount = total_item_price * (discount_percent / 100)
-            final_item_price = total_item_price - discount_amount
-
-            order_subtotal += final_item_price
-
-            itemized_breakdown.append({
-                "product_id": p_id,
-                "name": prod_name,
-                "quantity": qty,
-                "unit_price": base_price,
-                "discount_percent": f"{discount_percent}%",
-                "total": round(final_item_price, 2)
-            })
-
-        tax_rate = 14.0 # Default fallback
-        if cursor:
-            cursor.execute("SELECT tax_rate FROM tax_rates WHERE region = %s", (region,))
-            tax_row = cursor.fetchone()
-            if tax_row:
-                tax_rate = float(tax_row['tax_rate'])
-
-        tax_amount = order_subtotal * (tax_rate / 100)
-        final_total = order_subtotal + tax_amount
-
-        return jsonify({
-            "status": "success",
-            "breakdown": itemized_breakdown,
-            "subtotal": round(order_subtotal, 2),
-            "tax_rate": f"{tax_rate}%",
-            "tax_amount": round(tax_amount, 2),
-            "total_price": round(final_total, 2)
-        }), 200
+        inventory_products, error = resolve_products([item.get('product_id') for item in products_list])
+        if error:
+            return error
+        tax_rate = taxes.rate_for(region) if taxes else DEFAULT_TAX_RATE
+        return quote_lines(products_list, inventory_products, rule_discount(rules), tax_rate), 200
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+        return {"error": str(e)}, 500
+
+@app.route('/api/pricing/calculate/batch', methods=['POST'])
+def calculate_pricing_batch():
+    # Body: {"carts": [{"cart_id": "a1", "products": [...], "region": "EG"}, ...]}
+    # Every distinct product is resolved once for the whole batch (see
+    # resolve_products), and each distinct (product, quantity) discount and
+    # region tax rate is computed once. Results stream back as NDJSON, one
+    # line per cart in request order: the calculate_pricing body plus
+    # cart_id, index and missing_product_ids (ids that were skipped because
+    # no such product exists), or {"cart_id", "index", "error"} for a cart
+    # that could not be priced.
+    data = request.get_json(silent=True)
+    carts = data.get('carts') if isinstance(data, dict) else None
+    if not isinstance(carts, list) or not carts:
+        return jsonify({"error": "'carts' must be a non-empty list"}), 400
+    if len(carts) > BATCH_MAX_CARTS:
+        return jsonify({"error": f"At most {BATCH_MAX_CARTS} carts per batch"}), 400
+
+    generation = quote_generation
+    rules = current_snapshot('pricing_rules')
+    taxes = current_snapshot('tax_rates')
+
+    # Carts already in the quote cache need no lookups at all
+    entries = []
+    product_ids = set()
+    for index, cart in enumerate(carts):
+        cart = cart if isinstance(cart, dict) else {}
+        products_list = cart.get('products', [])
+        region = cart.get('region', 'EG')
+        try:
+            key = quote_key(products_list, region, generation)
+        except (AttributeError, TypeError):
+            key = None
+        cached = quote_cache.get(key) if key else None
+        entries.append((index, cart.get('cart_id'), products_list, region, key, cached))
+        if cached is None and isinstance(products_list, list):
+            for item in products_list:
+                p_id = item.get('product_id') if isinstance(item, dict) else None
+                if is_product_id(p_id):
+                    product_ids.add(int(p_id))
+
+    inventory_products = {}
+    if product_ids:
+        inventory_products, error = resolve_products(sorted(product_ids))
+        if error:
+            body, status = error
+            return jsonify(body), status
+
+    discount_lookup = rule_discount(rules)
+    discounts = {}
+    tax_rates = {}
+
+    def discount_for(p_id, qty):
+        try:
+            return discounts[(p_id, qty)]
+        except KeyError:
+            discount = discounts[(p_id, qty)] = discount_lookup(p_id, qty)
+            return discount
+
+    def generate():
+        for index, cart_id, products_list, region, key, cached in entries:
+            if cached is not None:
+                quote = in_request_order(cached, products_list)
+            else:
+                try:
+                    if region not in tax_rates:
+                        tax_rates[region] = taxes.rate_for(region) if taxes else DEFAULT_TAX_RATE
+                    quote = quote_lines(products_list, inventory_products, discount_for, tax_rates[region])
+                except Exception as e:
+                    yield json.dumps({"cart_id": cart_id, "index": index, "error": str(e)}) + "\n"
+                    continue
+                if key:
+                    quote_cache.set(key, quote)
+            # Ids compared by their JSON form, as they may be any JSON value
+            priced = {json.dumps(line['product_id']) for line in quote['breakdown']}
+            missing = {}
+            for item in products_list:
+                p_id = item.get('product_id')
+                missing.setdefault(json.dumps(p_id), p_id)
+            missing = [p_id for p_key, p_id in missing.items() if p_key not in priced]
+            yield json.dumps(dict(quote, cart_id=cart_id, index=index, missing_product_ids=missing)) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 if __name__ == '__main__':
+    refresh_snapshots()
+    start_pricing_refresher()
+    start_price_replica()
     app.run(port=5003, debug=True)
\ No newline at end of file
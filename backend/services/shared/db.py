@@ -0,0 +1,173 @@
+"""
+Pooled MySQL access shared by all services.
+
+Each service creates one ConnectionPool from its DB config and returns
+pool.get_connection() from its get_db_connection(). Connections are handed
+out as PooledConnection wrappers: calling close() gives the connection back
+to the pool instead of closing the socket, so handlers keep their existing
+open / close pattern.
+
+Configuration (environment variables):
+    DB_POOL_SIZE           connections per service (default 10, max 32)
+    DB_POOL_TIMEOUT        seconds to wait for a free connection (default 5)
+"""
+import os
+import threading
+import time
+
+import mysql.connector
+from mysql.connector import errors, pooling
+
+DEFAULT_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DEFAULT_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 5))
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled mysql.connector connection.
+    close() returns it to the pool exactly once; later calls are no-ops and
+    is_connected() reports False, matching a plain closed connection.
+    A wrapper dropped without close() returns its connection when it is
+    garbage collected, as an unpooled connection closes itself, so a missed
+    close() cannot hold a pool slot forever.
+    """
+
+    _connection = None
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise errors.OperationalError("Connection already returned to the pool")
+        return getattr(self._connection, name)
+
+    def is_connected(self):
+        return self._connection is not None and self._connection.is_connected()
+
+    def close(self):
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        self._pool._release(connection)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Bounded MySQL connection pool with wait timeouts, health checks on
+    checkout and wait-time metrics.
+
+    The underlying MySQLConnectionPool is created on first use so importing a
+    service does not require a reachable database.
+    """
+
+    def __init__(self, db_config, pool_name, pool_size=None, timeout=None):
+        self.db_config = db_config
+        self.pool_name = pool_name
+        self.pool_size = min(pool_size or DEFAULT_POOL_SIZE, pooling.CNX_POOL_MAXSIZE)
+        self.timeout = DEFAULT_POOL_TIMEOUT if timeout is None else timeout
+        self._pool = None
+        self._init_lock = threading.Lock()
+        # mysql.connector raises immediately when the pool is empty; the
+        # semaphore lets callers queue for a connection up to `timeout`.
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "in_use": 0,
+            "wait_timeouts": 0,
+            "health_check_failures": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._init_lock:
+                if self._pool is None:
+                    self._pool = pooling.MySQLConnectionPool(
+                        pool_name=self.pool_name,
+                        pool_size=self.pool_size,
+                        pool_reset_session=True,
+                        **self.db_config
+                    )
+        return self._pool
+
+    def get_connection(self):
+        """
+        Check out a healthy connection, waiting up to `timeout` seconds.
+        Raises mysql.connector.errors.PoolError when none becomes free.
+        """
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._stats_lock:
+                self._stats["wait_timeouts"] += 1
+            raise errors.PoolError(
+                f"No connection available in pool '{self.pool_name}' after {self.timeout}s"
+            )
+
+        connection = None
+        try:
+            connection = self._get_pool().get_connection()
+            if not self._healthy(connection):
+                with self._stats_lock:
+                    self._stats["health_check_failures"] += 1
+                connection.reconnect(attempts=2, delay=0)
+        except Exception:
+            if connection is not None:
+                # Hand the broken connection back so the pool keeps its size
+                try:
+                    connection.close()
+                except mysql.connector.Error:
+                    pass
+            self._slots.release()
+            raise
+
+        waited_ms = (time.perf_counter() - started) * 1000.0
+        with self._stats_lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["total_wait_ms"] += waited_ms
+            self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], waited_ms)
+        return PooledConnection(self, connection)
+
+    @staticmethod
+    def _healthy(connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except mysql.connector.Error:
+            return False
+
+    def _release(self, connection):
+        try:
+            # Rolls back anything uncommitted and hands the socket back
+            connection.close()
+        finally:
+            with self._stats_lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        checkouts = snapshot["checkouts"]
+        snapshot["avg_wait_ms"] = round(snapshot["total_wait_ms"] / checkouts, 3) if checkouts else 0.0
+        snapshot["total_wait_ms"] = round(snapshot["total_wait_ms"], 3)
+        snapshot["max_wait_ms"] = round(snapshot["max_wait_ms"], 3)
+        snapshot["pool_name"] = self.pool_name
+        snapshot["pool_size"] = self.pool_size
+        return snapshot
@@ -0,0 +1,217 @@
+"""
+Keep-alive HTTP client for service-to-service calls.
+
+One ServiceClient exists per target host (see get_client). Each one owns a
+requests.Session with a bounded connection pool, so sockets are reused
+across requests instead of opening a new TCP connection per call, and adds:
+
+    - a deadline per call (covers retries too)
+    - retries with exponential backoff and full jitter, for idempotent
+      requests only (GET by default)
+    - a circuit breaker that fails fast while the target keeps failing
+
+Failures surface as the usual requests exceptions, so existing
+`except requests.exceptions.RequestException` handlers keep working.
+
+Configuration (environment variables):
+    HTTP_CLIENT_TIMEOUT            default deadline in seconds (default 5)
+    HTTP_CLIENT_RETRIES            extra attempts for idempotent calls (default 2)
+    HTTP_CLIENT_POOL_SIZE          keep-alive connections per host (default 20)
+    HTTP_CLIENT_FAILURE_THRESHOLD  consecutive failures that open the circuit (default 5)
+    HTTP_CLIENT_RESET_TIMEOUT      seconds before a half-open probe (default 10)
+"""
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = float(os.environ.get('HTTP_CLIENT_TIMEOUT', 5))
+DEFAULT_RETRIES = int(os.environ.get('HTTP_CLIENT_RETRIES', 2))
+DEFAULT_POOL_SIZE = int(os.environ.get('HTTP_CLIENT_POOL_SIZE', 20))
+DEFAULT_FAILURE_THRESHOLD = int(os.environ.get('HTTP_CLIENT_FAILURE_THRESHOLD', 5))
+DEFAULT_RESET_TIMEOUT = float(os.environ.get('HTTP_CLIENT_RESET_TIMEOUT', 10))
+
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+RETRY_STATUSES = frozenset([502, 503, 504])
+BACKOFF_BASE = 0.05
+BACKOFF_CAP = 1.0
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while a host's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    closed    -> requests flow; consecutive failures are counted
+    open      -> requests fail fast until reset_timeout has passed
+    half-open -> a single probe is let through; success closes the circuit,
+                 failure opens it again
+    """
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or DEFAULT_FAILURE_THRESHOLD
+        self.reset_timeout = DEFAULT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+                self._probe_in_flight = False
+            if self.state == "half-open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def release_probe(self):
+        # The call ended without telling anything about the host; let the
+        # next caller probe instead of staying half-open forever
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class ServiceClient:
+    def __init__(self, base_url, timeout=None, retries=None, pool_size=None,
+                 failure_threshold=None, reset_timeout=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+        self.retries = DEFAULT_RETRIES if retries is None else retries
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        pool_size = pool_size or DEFAULT_POOL_SIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+
+    def _count(self, key):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _url(self, path_or_url):
+        if path_or_url.startswith(('http://', 'https://')):
+            return path_or_url
+        return f"{self.base_url}/{path_or_url.lstrip('/')}"
+
+    def request(self, method, path, timeout=None, idempotent=None, **kwargs):
+        """
+        Send a request, retrying idempotent ones until `timeout` seconds have
+        passed in total. 5xx gateway errors, connection problems and other
+        request errors count as failures for the circuit breaker; only the
+        first two are retried. Any other response is returned.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + (self.retries if idempotent else 0)
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        url = self._url(path)
+
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                self._count("short_circuited")
+                raise CircuitOpenError(f"Circuit open for {self.base_url}")
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise requests.exceptions.Timeout(f"Deadline exceeded calling {url}")
+
+            self._count("requests")
+            try:
+                response = self.session.request(method, url, timeout=remaining, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.breaker.record_failure()
+                self._count("failures")
+                if attempt + 1 >= attempts or not self._backoff(attempt, deadline):
+                    raise
+                continue
+            except requests.exceptions.RequestException:
+                # e.g. ChunkedEncodingError: a failure, but not one to retry
+                self.breaker.record_failure()
+                self._count("failures")
+                raise
+            except Exception:
+                self.breaker.release_probe()
+                raise
+
+            if response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+                self._count("failures")
+                if attempt + 1 < attempts and self._backoff(attempt, deadline):
+                    continue
+                return response
+
+            self.breaker.record_success()
+            return response
+
+    def _backoff(self, attempt, deadline):
+        # Full jitter: sleep a random time up to the exponential bound, but
+        # never past the deadline. Returns False when no time is left.
+        delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+        if time.monotonic() + delay >= deadline:
+            return False
+        time.sleep(delay)
+        self._count("retries")
+        return True
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request('PUT', path, **kwargs)
+
+    def stats(self):
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        snapshot["base_url"] = self.base_url
+        snapshot["circuit"] = self.breaker.state
+        return snapshot
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url, **kwargs):
+    """
+    Shared ServiceClient for the host of `base_url`; every caller in the
+    process that targets the same scheme://host:port reuses its pool.
+    """
+    parts = urlsplit(base_url)
+    key = f"{parts.scheme}://{parts.netloc}"
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = ServiceClient(key, **kwargs)
+    return client